@@ -18,15 +18,16 @@ class AreaSelector:
         self.start_drag: bool = False
         self.target_rect: Rect = Rect(0, 0, 0, 0)
         self._has_moved = False
+        # Allocated once, only the part of the size of the selection gets blitted
+        self._selection_surface: Surface = pygame.Surface(target_surface.get_size())
+        self._selection_surface.fill(YELLOW)
+        self._selection_surface.set_alpha(64)
 
         event_dispatcher.listen(self.on_select_preview, event_type=pygame.MOUSEMOTION)
 
     def draw(self, surface: Surface):
         if self.start_drag:
-            selection_surface = pygame.Surface(self.target_rect.size)
-            selection_surface.fill(YELLOW)
-            selection_surface.set_alpha(64)
-            surface.blit(selection_surface, self.target_rect.topleft)
+            surface.blit(self._selection_surface, self.target_rect.topleft, Rect((0, 0), self.target_rect.size))
 
     def start_select(self, pos: Vector2):
         if self.target_surface.get_rect().collidepoint(pos.x, pos.y):
@@ -0,0 +1,147 @@
+"""
+Packed array dataset that can be read through memory maps.
+
+    <folder>/images.npy    (N, H, W) uint8 grayscale images
+    <folder>/stats.npy     (N, len(STAT_KEYS)) float32 stats
+    <folder>/labels.npy    (N,) int64 label indices
+    <folder>/labels.json   label names
+
+The arrays are written with numpy's .npy format, so they can be opened with np.load(mmap_mode="r") and
+only the pages that are actually read get loaded.
+"""
+import io
+import json
+import os
+from typing import Iterable, Tuple, List
+
+import numpy as np
+from PIL import Image
+
+from shards import ShardReader
+
+STAT_KEYS = ["attack", "defense", "speed", "life", "aesthetic"]
+IMAGES_FILE = "images.npy"
+STATS_FILE = "stats.npy"
+LABELS_FILE = "labels.npy"
+LABEL_NAMES_FILE = "labels.json"
+# Image size of an empty dataset, the size of the default export (see exporter.EXPORT_SIZE)
+DEFAULT_IMAGE_SHAPE = (128, 128)
+
+
+def decode_png(png: bytes | str) -> Tuple[np.ndarray, dict]:
+    """
+    Decodes a png into a grayscale image.
+    :param png: encoded png or path of the png file
+    :return: (H, W) uint8 image and the text chunks of the png
+    """
+    with Image.open(io.BytesIO(png) if isinstance(png, bytes) else png) as image:
+        return np.asarray(image.convert("L")), dict(image.info)
+
+
+def get_png_shape(path: str) -> Tuple[int, int]:
+    # Only the header of the png gets read
+    with Image.open(path) as image:
+        return image.height, image.width
+
+
+def pack_samples(folder: str, samples: Iterable[Tuple[np.ndarray, dict, int]], count: int,
+                 label_names: List[str], image_shape: Tuple[int, int] | None = None) -> int:
+    """
+    Writes the samples into the packed arrays. The arrays are filled through memory maps,
+    so the dataset never has to fit into memory.
+    :param folder: to write the arrays to
+    :param samples: grayscale image, stats and label index of every sample
+    :param count: number of samples
+    :param label_names: names of the label indices
+    :param image_shape: (H, W) of all images, taken from the first image if not given
+    :return: number of packed samples
+    """
+    os.makedirs(folder, exist_ok=True)
+    images = None
+    if image_shape is not None or count == 0:
+        images = np.lib.format.open_memmap(os.path.join(folder, IMAGES_FILE), "w+", np.uint8,
+                                           (count,) + tuple(image_shape or DEFAULT_IMAGE_SHAPE))
+    stats = np.lib.format.open_memmap(os.path.join(folder, STATS_FILE), "w+", np.float32, (count, len(STAT_KEYS)))
+    labels = np.lib.format.open_memmap(os.path.join(folder, LABELS_FILE), "w+", np.int64, (count,))
+    packed = 0
+    for image, sample_stats, label in samples:
+        if images is None:
+            images = np.lib.format.open_memmap(os.path.join(folder, IMAGES_FILE), "w+", np.uint8,
+                                               (count,) + image.shape)
+        if image.shape != images.shape[1:]:
+            raise ValueError(f"Sample {packed} is {image.shape[1]}x{image.shape[0]}, "
+                             f"the dataset is {images.shape[2]}x{images.shape[1]}")
+        images[packed] = image
+        stats[packed] = [float(sample_stats[key]) for key in STAT_KEYS]
+        labels[packed] = label
+        packed += 1
+    if packed != count:
+        raise ValueError(f"Expected {count} samples but got {packed}")
+    for array in (images, stats, labels):
+        array.flush()
+    with open(os.path.join(folder, LABEL_NAMES_FILE), "w") as f:
+        json.dump(label_names, f)
+    return packed
+
+
+def pack_png_folders(data_folder: str, folder: str) -> int:
+    """
+    Packs an exported png dataset (one sub folder per label, stats as png text chunks).
+    :param data_folder: with one folder per label
+    :param folder: to write the arrays to
+    :return: number of packed samples
+    """
+    # Files next to the label folders (e.g. a manifest) are no labels
+    label_names = sorted(name for name in os.listdir(data_folder) if os.path.isdir(os.path.join(data_folder, name)))
+    files = [(os.path.join(data_folder, label, file), label_index)
+             for label_index, label in enumerate(label_names)
+             for file in sorted(os.listdir(os.path.join(data_folder, label))) if file.endswith(".png")]
+
+    # The headers are checked before anything gets written
+    shapes = {}
+    for path, _ in files:
+        shapes.setdefault(get_png_shape(path), path)
+    if len(shapes) > 1:
+        raise ValueError("The images have different sizes: " +
+                         ", ".join(f"{width}x{height} ({path})" for (height, width), path in shapes.items()))
+    image_shape = next(iter(shapes), None)
+
+    def samples():
+        for path, label_index in files:
+            image, info = decode_png(path)
+            yield image, info, label_index
+
+    return pack_samples(folder, samples(), len(files), label_names, image_shape)
+
+
+def pack_shards(shard_folder: str, folder: str) -> int:
+    """
+    Packs a sharded dataset (see shards.py).
+    :param shard_folder: of the sharded dataset
+    :param folder: to write the arrays to
+    :return: number of packed samples
+    """
+    reader = ShardReader(shard_folder)
+    label_names = reader.get_labels()
+
+    def samples():
+        for key, png, meta in reader:
+            yield decode_png(png)[0], meta, label_names.index(meta["label"])
+
+    return pack_samples(folder, samples(), len(reader), label_names)
+
+
+def open_arrays(folder: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Opens the packed arrays read only as memory maps.
+    :param folder: of the packed dataset
+    :return: images, stats and labels
+    """
+    return (np.load(os.path.join(folder, IMAGES_FILE), mmap_mode="r"),
+            np.load(os.path.join(folder, STATS_FILE), mmap_mode="r"),
+            np.load(os.path.join(folder, LABELS_FILE), mmap_mode="r"))
+
+
+def read_label_names(folder: str) -> List[str]:
+    with open(os.path.join(folder, LABEL_NAMES_FILE), "r") as f:
+        return json.load(f)
@@ -1,31 +1,18 @@
 import math
-from typing import List, Tuple
+from typing import List, Tuple, Iterable
 
+import dill
 import numpy as np
 import pygame
 from pygame import Surface, Vector2
 from pygame.event import Event
 
+from bezier import adaptive_bezier_curves, BEZIER_TOLERANCE
 from consts import EDIT_FORM
 from line import Line, LineSetting
 from point import Point, PointSetting
 from selection_handler import SelectionHandler, Selectable, Marks
-
-
-class Stats:
-    def __init__(self):
-        self.attack: float = 0.5
-        self.defense: float = 0.5
-        self.speed: float = 0.5
-        self.life: float = 0.5
-        self.aesthetic: float = 0.5
-
-    def scale(self, factor):
-        self.attack *= factor
-        self.defense *= factor
-        self.speed *= factor
-        self.life *= factor
-        self.aesthetic *= factor
+from stats import Stats
 
 
 class BaseForm(SelectionHandler):
@@ -36,15 +23,28 @@ class BaseForm(SelectionHandler):
         self.previous_point: Point | None = None
         self.stats = Stats()
 
-    def draw(self, screen: Surface):
-        for line in self.lines:
-            line.draw(screen)
+    def draw(self, screen: Surface, tolerance: float = BEZIER_TOLERANCE):
+        for line, curve in zip(self.lines, self.get_curves(tolerance)):
+            line.draw(screen, curve)
         for point in self.points:
             point.draw(screen)
 
-    def render(self, screen: Surface):
-        for line in self.lines:
-            line.render(screen)
+    def render(self, screen: Surface, tolerance: float = BEZIER_TOLERANCE):
+        for line, curve in zip(self.lines, self.get_curves(tolerance)):
+            line.render(screen, curve)
+
+    def get_curves(self, tolerance: float = BEZIER_TOLERANCE) -> List[np.ndarray | None]:
+        """
+        Evaluates the bezier curves of all curved lines in one go.
+        :param tolerance: max distance in pixels between the tessellated and the real curve
+        :return: (T, 2) curve points for every curved line and None for straight lines (same order as lines)
+        """
+        curved_lines = [line for line in self.lines if line.settings.curve]
+        if len(curved_lines) == 0:
+            return [None] * len(self.lines)
+        control_points = np.array([line.get_control_points() for line in curved_lines])
+        curves = iter(adaptive_bezier_curves(control_points, tolerance))
+        return [next(curves) if line.settings.curve else None for line in self.lines]
 
     def add_point(self, pos: Vector2, point_setting: PointSetting, line_setting: LineSetting) -> (Point, Line | None):
         point = Point(pos, point_setting)
@@ -65,26 +65,40 @@ class BaseForm(SelectionHandler):
         pygame.event.post(Event(EDIT_FORM))
         return line
 
-    def remove(self, selectables: List[Selectable]):
+    def remove(self, selectables: Iterable[Selectable]):
         selectables = [selectable for selectable in selectables if not selectable.is_marked(Marks.BEZIER)]
-        for selectable in selectables:
-            if isinstance(selectable, Point):
-                self.points.remove(selectable)
-            if isinstance(selectable, Line):
-                self.lines.remove(selectable)
-                self.remove_selectables([selectable.point_a_bezier, selectable.point_b_bezier])
+        removed = set(selectables)
+        self.points = [point for point in self.points if point not in removed]
+        removed_lines = [line for line in self.lines if line in removed]
+        self.lines = [line for line in self.lines if line not in removed]
+        for line in removed_lines:
+            self.remove_selectables([line.point_a_bezier, line.point_b_bezier])
         self.remove_selectables(selectables)
         pygame.event.post(Event(EDIT_FORM))
 
     def regenerate(self):
         for line in self.lines:
             line.regenerate()
+        self.invalidate_selectables()
 
     def scale(self, factor: float):
         for point in self.points:
             point.scale(factor)
         for line in self.lines:
             line.scale(factor)
+        self.invalidate_selectables()
+
+    def update_moved(self, moved: List[Selectable]):
+        """
+        Updates the bounding boxes of moved elements and of all lines attached to moved points.
+        :param moved: elements that have been moved
+        """
+        moved_ids = {id(element) for element in moved}
+        attached_lines = [line for line in self.lines
+                          if id(line.point_a) in moved_ids or id(line.point_b) in moved_ids
+                          or id(line.point_a_bezier) in moved_ids or id(line.point_b_bezier) in moved_ids]
+        self.update_selectables(moved)
+        self.update_selectables(attached_lines)
 
     def set_previous_point(self, point: Point | None):
         if point.is_marked(Marks.BEZIER):
@@ -101,3 +115,13 @@ class BaseForm(SelectionHandler):
 
     def to_numpy(self):
         return np.array([p.get_pos() for p in self.points])
+
+
+def load_pickled_form(file: str) -> BaseForm:
+    """
+    Loads a base form stored with dill before the form files were introduced (see form_file.py).
+    :param file: path of the pickled base form
+    :return: the loaded base form
+    """
+    with open(file, "rb") as f:
+        return dill.load(f)
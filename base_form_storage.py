@@ -1,6 +1,5 @@
 import os
 
-import dill
 import pygame
 import pygame_gui
 from pygame import KEYUP
@@ -10,6 +9,8 @@ from pygame_gui.core import UIContainer
 from pygame_gui.elements import UIButton, UITextEntryLine
 
 from base_form_view import BaseFormView
+from catalog import Catalog
+from compiled_form import load_form, save_form
 from consts import LOAD_FORM, FILE_SUFFIX
 from event_dispatcher import EventDispatcher
 from file_picker import FilePicker
@@ -20,6 +21,8 @@ class BaseFormStorageView(UIContainer):
                  relative_rect: pygame.Rect, anchors: dict[str, str]):
         super().__init__(relative_rect, pygame_gui.ui_manager.get_default_manager(), anchors=anchors)
         self.path = "base_forms"
+        self.catalog = Catalog(self.path)
+        self.catalog.update()
         self.load_button = UIButton(pygame.Rect(10, 10, 150, 30), 'Load', container=self)
         self.save_button = UIButton(pygame.Rect(10, 40, 150, 30), 'Save', container=self)
         self.file_name = UITextEntryLine(pygame.Rect(10, 70, 150, 30), container=self,
@@ -39,17 +42,19 @@ class BaseFormStorageView(UIContainer):
 
     def load(self, file):
         try:
-            with open(file, "rb") as f:
-                self.set_filename(file)
-                current_base_form = dill.load(f)
-                self.base_form_view.set_current_form(current_base_form)
-                pygame.event.post(Event(LOAD_FORM, form=current_base_form))
+            self.set_filename(file)
+            current_base_form = load_form(file)
+            self.base_form_view.set_current_form(current_base_form)
+            pygame.event.post(Event(LOAD_FORM, form=current_base_form))
         except Exception as ex:
-            print("Error during unpickling object (Possibly unsupported):", ex)
+            print("Error during loading the base form:", ex)
         self.enable_input()
 
     def set_filename(self, filepath):
         self.path = os.path.dirname(filepath)
+        if os.path.abspath(self.path) != os.path.abspath(self.catalog.folder):
+            self.catalog = Catalog(self.path)
+            self.catalog.update()
         self.file_name.set_text(os.path.basename(filepath).split(".")[0])
 
     def on_save(self, event: Event):
@@ -58,10 +63,11 @@ class BaseFormStorageView(UIContainer):
 
     def save(self):
         try:
-            with open(os.path.join(self.path, self.file_name.get_text() + FILE_SUFFIX), "wb") as f:
-                dill.dump(self.base_form_view.get_current_form(), f)
+            file = os.path.join(self.path, self.file_name.get_text() + FILE_SUFFIX)
+            save_form(self.base_form_view.get_current_form(), file)
+            self.catalog.update_file(file)
         except Exception as ex:
-            print("Error during pickling object (Possibly unsupported):", ex)
+            print("Error during saving the base form:", ex)
         self.enable_input()
 
     def enable_input(self):
@@ -75,7 +81,7 @@ class BaseFormStorageView(UIContainer):
         return False
 
     def get_free_name(self) -> str:
-        files = os.listdir(self.path)
+        files = self.catalog.get_names()
         i = 0
         def_name = "unnamed"
         current_filename = def_name + FILE_SUFFIX
@@ -9,6 +9,7 @@ from pygame.surface import Surface
 
 from area_selector import AreaSelector
 from base_form import BaseForm
+from compiled_form import CompiledForm
 from consts import LEFT_MOUSE_BUTTON, RIGHT_MOUSE_BUTTON, EDIT_FORM, POINT_SIZE
 from dnd_handler import DragAndDropHandler, DragAble
 from event_dispatcher import EventDispatcher
@@ -27,7 +28,11 @@ class BaseFormView(DragAndDropHandler):
                  line_setting_view: LineSettingView):
         super().__init__(event_dispatcher)
         self.form_surface = pygame.Surface((512, 512))
+        self.rect: Rect = self.form_surface.get_rect()
+        self.dirty: bool = True
         self.form: BaseForm = BaseForm()
+        # Arrays of the form shared by all previews, compiled again after the form changed
+        self.compiled_form: CompiledForm | None = None
         self.mode: Modes = Modes.FROM_EDIT
         self.editable: bool = True
         self.area_selector: AreaSelector = AreaSelector(event_dispatcher, self.form_surface)
@@ -37,19 +42,32 @@ class BaseFormView(DragAndDropHandler):
         event_dispatcher.listen(self.on_button_down, event_type=pygame.MOUSEBUTTONDOWN)
         event_dispatcher.listen(self.on_button_up, event_type=pygame.MOUSEBUTTONUP)
         event_dispatcher.listen(self.on_keyup, event_type=pygame.KEYUP)
+        event_dispatcher.observe(self.on_observe)
 
     def draw(self, screen: Surface):
         self.form_surface.fill((30, 30, 30))
         if self.form is not None:
             self.form.draw(self.form_surface)
         self.area_selector.draw(self.form_surface)
-        screen.blit(self.form_surface, (0, 0))
+        screen.blit(self.form_surface, self.rect.topleft)
+        self.dirty = False
+
+    def invalidate(self):
+        self.dirty = True
+        self.compiled_form = None
+
+    def on_observe(self, event: Event):
+        # Edits, selections and setting changes all arrive as events, plain mouse moves only change the form
+        # while something gets dragged or an area gets selected.
+        if event.type != pygame.MOUSEMOTION or self.is_dragging() or self.area_selector.start_drag:
+            self.invalidate()
 
     def disable(self):
         self.mode = Modes.DISABLED
         self.area_selector.stop_select()
         self.area_selector.enabled = False
         self.stop_drag()
+        self.invalidate()
 
     def enable(self):
         self.mode = Modes.FROM_EDIT
@@ -84,6 +102,7 @@ class BaseFormView(DragAndDropHandler):
             if self.mode == Modes.BOUND_EDIT:
                 points = self.get_selected_points()
                 points[0].set_bounds(selected_rect)
+                self.form.update_moved([points[0]])
                 pygame.event.post(Event(EDIT_FORM))
                 self.mode = Modes.FROM_EDIT
                 return True
@@ -94,6 +113,9 @@ class BaseFormView(DragAndDropHandler):
                 return True
         return False
 
+    def on_moved(self, moved_objects: List[DragAble]):
+        self.form.update_moved(moved_objects)
+
     def click_bound_edit(self, event: Event):
         self.area_selector.start_select(Vector2(event.pos))
 
@@ -176,6 +198,12 @@ class BaseFormView(DragAndDropHandler):
     def set_current_form(self, form: BaseForm):
         print("Show new form")
         self.form = form if form is not None else BaseForm()
+        self.invalidate()
 
     def get_current_form(self) -> BaseForm:
         return self.form
+
+    def get_compiled_form(self) -> CompiledForm:
+        if self.compiled_form is None:
+            self.compiled_form = CompiledForm(self.form)
+        return self.compiled_form
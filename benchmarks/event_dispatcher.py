@@ -0,0 +1,58 @@
+"""
+Micro benchmark of EventDispatcher.process_event.
+
+Registers a growing number of element bound listeners (like the text entries and checkboxes of the editor)
+plus a fixed set of MOUSEMOTION listeners and measures the time per dispatched event. With the indexed
+dispatcher the time per event stays flat while the total listener count grows.
+
+    python -m benchmarks.event_dispatcher
+"""
+import os
+import timeit
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from pygame.event import Event
+from pygame_gui import UI_TEXT_ENTRY_CHANGED
+
+from consts import CHECKBOX_CHANGED
+from event_dispatcher import EventDispatcher
+
+LISTENER_COUNTS = [10, 100, 1000, 10000]
+MOTION_LISTENERS = 3
+REPEATS = 5
+EVENTS = 2000
+
+
+def create_dispatcher(listener_count: int) -> (EventDispatcher, list):
+    dispatcher = EventDispatcher()
+    elements = [object() for _ in range(listener_count)]
+    for i, element in enumerate(elements):
+        event_type = UI_TEXT_ENTRY_CHANGED if i % 2 == 0 else CHECKBOX_CHANGED
+        dispatcher.listen(lambda event: False, element=element, event_type=event_type)
+    for _ in range(MOTION_LISTENERS):
+        dispatcher.listen(lambda event: False, event_type=pygame.MOUSEMOTION)
+    return dispatcher, elements
+
+
+def measure(listener_count: int) -> dict:
+    dispatcher, elements = create_dispatcher(listener_count)
+    motion = Event(pygame.MOUSEMOTION, pos=(10, 10), rel=(1, 1), buttons=(0, 0, 0))
+    text_changed = Event(UI_TEXT_ENTRY_CHANGED, ui_element=elements[0], text="-12.5")
+    results = {"listeners": listener_count + MOTION_LISTENERS}
+    for name, event in (("mouse_motion", motion), ("text_entry_changed", text_changed)):
+        best = min(timeit.repeat(lambda: dispatcher.process_event(event), number=EVENTS, repeat=REPEATS))
+        results[name + "_us"] = best / EVENTS * 1e6
+    return results
+
+
+def main():
+    print(f"{'listeners':>10} {'motion [us/event]':>18} {'text entry [us/event]':>22}")
+    for listener_count in LISTENER_COUNTS:
+        result = measure(listener_count)
+        print(f"{result['listeners']:>10} {result['mouse_motion_us']:>18.2f} {result['text_entry_changed_us']:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark suite of the generation and editor hot paths. Runs headless on synthetic forms and writes the
+results as JSON, so runs of different revisions can be compared.
+
+    python -m benchmarks.suite --out results.json
+    python -m benchmarks.suite --out new.json --compare results.json
+
+With --compare the run fails when a benchmark got slower than the threshold.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from typing import Callable, List
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pygame
+from pygame import Rect, Surface
+
+from base_form import BaseForm, Stats
+from benchmarks import event_dispatcher
+from bezier import bezier_curve
+from compiled_form import CompiledForm
+from exporter import Exporter, FORM_SIZE
+
+POINT_COUNTS = [10, 100, 1000, 10000]
+# Seconds every benchmark should roughly run per repeat
+TARGET_TIME = 0.2
+REPEATS = 5
+SEED = 1234
+
+
+def create_form(point_count: int, seed: int = SEED) -> BaseForm:
+    """
+    Creates a synthetic form: one chain of lines through random points, every fourth line is a curve.
+    :param point_count: number of points
+    :param seed: of the random positions
+    :return: the form
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(32, FORM_SIZE[0] - 32, size=(point_count, 2))
+    line_count = point_count - 1
+    lines = np.stack([np.arange(line_count), np.arange(1, line_count + 1)], axis=1)
+    handles = positions[lines] + rng.uniform(-20, 20, size=(line_count, 2, 2))
+    arrays = {
+        "positions": positions,
+        "base": positions.copy(),
+        "variance_min": np.full((point_count, 2), -10.0),
+        "variance_max": np.full((point_count, 2), 10.0),
+        "lines": lines,
+        "handles": handles,
+        "widths": np.full(line_count, 4, dtype=np.int32),
+        "curves": np.arange(line_count) % 4 == 0,
+        "width_variance": np.tile([1.0, 5.0], (line_count, 1)),
+        "body_parts": np.zeros(line_count, dtype=np.int32),
+        "body_features": np.zeros(line_count, dtype=np.int32),
+    }
+    return CompiledForm.from_arrays(arrays, point_count, Stats()).to_base_form()
+
+
+def measure(function: Callable[[], any]) -> dict:
+    """
+    Times the function with as many calls per repeat as fit into TARGET_TIME.
+    :param function: to time
+    :return: best seconds per call, calls per repeat and repeats
+    """
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * TARGET_TIME / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=REPEATS, number=number))
+    return {"seconds": best / number, "number": number, "repeats": REPEATS}
+
+
+def benchmark_form(point_count: int) -> List[dict]:
+    form = create_form(point_count)
+    surface = Surface((128, 128))
+    exporter = Exporter(form)
+    export_folder = tempfile.mkdtemp(prefix="chalkling-benchmark-")
+    selection = Rect(128, 128, 128, 128)
+    control_points = form.lines[0].get_control_points()
+
+    benchmarks = {
+        "bezier_curve": lambda: bezier_curve(control_points, 10),
+        "regenerate": lambda: form.regenerate(),
+        "deepcopy": lambda: copy.deepcopy(form),
+        "render_128": lambda: form.render(surface),
+        # Same work per image as the export of the editor: sample, render, label, encode and write one png
+        "export_image": lambda: exporter.export_range(export_folder, 0, range(1), SEED),
+        "get_selected": lambda: form.get_selected(selection),
+    }
+    results = []
+    for name, function in benchmarks.items():
+        result = dict(name=name, points=point_count, **measure(function))
+        results.append(result)
+        print(f"{name:>16} {point_count:>8} points {result['seconds'] * 1e6:>14.1f} us", file=sys.stderr)
+    for file in os.listdir(export_folder):
+        os.remove(os.path.join(export_folder, file))
+    os.rmdir(export_folder)
+    return results
+
+
+def benchmark_dispatcher() -> List[dict]:
+    results = []
+    for listener_count in event_dispatcher.LISTENER_COUNTS:
+        measured = event_dispatcher.measure(listener_count)
+        for name in ("mouse_motion", "text_entry_changed"):
+            results.append({"name": f"process_event_{name}", "listeners": measured["listeners"],
+                            "seconds": measured[name + "_us"] / 1e6, "number": event_dispatcher.EVENTS,
+                            "repeats": event_dispatcher.REPEATS})
+        print(f"{'process_event':>16} {measured['listeners']:>8} listeners "
+              f"{measured['mouse_motion_us']:>10.2f} / {measured['text_entry_changed_us']:.2f} us", file=sys.stderr)
+    return results
+
+
+def get_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_key(result: dict) -> str:
+    return f"{result['name']}:{result.get('points', result.get('listeners'))}"
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> List[str]:
+    """
+    Finds the benchmarks that got slower than the baseline.
+    :param results: of this run
+    :param baseline: results of an earlier run
+    :param threshold: allowed slow down, 0.2 = 20 %
+    :return: descriptions of the regressions
+    """
+    baseline = {get_key(result): result["seconds"] for result in baseline}
+    regressions = []
+    for result in results:
+        before = baseline.get(get_key(result))
+        if before is not None and result["seconds"] > before * (1 + threshold):
+            regressions.append(f"{get_key(result)} {before * 1e6:.1f} us -> {result['seconds'] * 1e6:.1f} us")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the generation and editor hot paths.")
+    parser.add_argument("--points", type=int, nargs="+", default=POINT_COUNTS, help="point counts of the forms")
+    parser.add_argument("--out", default=None, help="json file to write the results to (default: stdout)")
+    parser.add_argument("--compare", default=None, help="json results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slow down when comparing")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    results = []
+    for point_count in args.points:
+        results.extend(benchmark_form(point_count))
+    results.extend(benchmark_dispatcher())
+
+    report = {
+        "revision": get_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+    if args.out is None:
+        json.dump(report, sys.stdout, indent=1)
+    else:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.compare is not None:
+        with open(args.compare, "r") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        return 1 if len(regressions) > 0 else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
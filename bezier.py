@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import List, Tuple
 
 import numpy as np
@@ -6,6 +7,10 @@ from scipy.special import comb
 
 # See https://stackoverflow.com/questions/12643079/b%C3%A9zier-curve-fitting-with-scipy
 
+# Max distance in pixels between a tessellated curve and the real curve
+BEZIER_TOLERANCE = 0.5
+MAX_BEZIER_SEGMENTS = 64
+
 
 def bernstein_poly(i: int, n: int, t):
     """
@@ -15,6 +20,32 @@ def bernstein_poly(i: int, n: int, t):
     return comb(n, i) * (t ** (n - i)) * (1 - t) ** i
 
 
+@lru_cache(maxsize=64)
+def bernstein_matrix(n_points: int, n_times: int) -> np.ndarray:
+    """
+     The (n_times, n_points) matrix of all Bernstein polynomials evaluated at n_times steps.
+     The matrix is cached and read only, so it has to be computed only once per shape.
+    """
+
+    t = np.linspace(0.0, 1.0, n_times)
+    matrix = np.array([bernstein_poly(i, n_points - 1, t) for i in range(0, n_points)]).T
+    matrix.flags.writeable = False
+    return matrix
+
+
+def bezier_curves(control_points: np.ndarray, n_times: int = 10) -> np.ndarray:
+    """
+       Evaluates many bezier curves at once.
+
+       control_points is an array of shape (..., K, 2), e.g. (L, 4, 2) for all curved lines
+       of a form or (N, L, 4, 2) for a batch of variants.
+       The result has the shape (..., n_times, 2).
+    """
+
+    control_points = np.asarray(control_points, dtype=np.float64)
+    return bernstein_matrix(control_points.shape[-2], n_times) @ control_points
+
+
 def bezier_curve(points: List[Tuple[float, float]], n_times: int = 10) -> List[Tuple[float, float]]:
     """
        Given a set of control points, return the
@@ -29,15 +60,43 @@ def bezier_curve(points: List[Tuple[float, float]], n_times: int = 10) -> List[T
         See http://processingjs.nihongoresources.com/bezierinfo/
     """
 
-    n_points = len(points)
-    x_points = np.array([p[0] for p in points])
-    y_points = np.array([p[1] for p in points])
+    curve = bezier_curves(np.array(points, dtype=np.float64), n_times)
+    return list(zip(curve[:, 0], curve[:, 1]))
 
-    t = np.linspace(0.0, 1.0, n_times)
 
-    polynomial_array = np.array([bernstein_poly(i, n_points - 1, t) for i in range(0, n_points)])
+def flatness_segments(control_points: np.ndarray, tolerance: float = BEZIER_TOLERANCE,
+                      max_segments: int = MAX_BEZIER_SEGMENTS) -> np.ndarray:
+    """
+       Number of line segments per cubic curve so the polyline stays within tolerance of the curve.
+
+       control_points is an array of shape (..., 4, 2) in target pixel space.
+       A polyline with n segments deviates at most max|B''| / (8 * n^2) from the curve and
+       max|B''| of a cubic is 6 * max(|P0 - 2 P1 + P2|, |P1 - 2 P2 + P3|).
+    """
 
-    x_vals = np.dot(x_points, polynomial_array)
-    y_vals = np.dot(y_points, polynomial_array)
+    control_points = np.asarray(control_points, dtype=np.float64)
+    p0, p1, p2, p3 = (control_points[..., i, :] for i in range(4))
+    second_difference = np.maximum(np.linalg.norm(p0 - 2 * p1 + p2, axis=-1),
+                                   np.linalg.norm(p1 - 2 * p2 + p3, axis=-1))
+    segments = np.ceil(np.sqrt(6 * second_difference / (8 * tolerance)))
+    return np.clip(segments, 1, max_segments).astype(np.intp)
+
+
+def adaptive_bezier_curves(control_points: np.ndarray, tolerance: float = BEZIER_TOLERANCE) -> List[np.ndarray]:
+    """
+       Evaluates many cubic bezier curves with as few points as the tolerance allows.
+
+       control_points is an array of shape (..., 4, 2) in target pixel space.
+       Returns one (segments + 1, 2) array per curve, flattened over the leading dimensions.
+       Curves that need the same number of segments are evaluated together.
+    """
 
-    return list(zip(x_vals, y_vals))
+    control_points = np.asarray(control_points, dtype=np.float64)
+    flat_points = control_points.reshape(-1, 4, 2)
+    segments = flatness_segments(flat_points, tolerance)
+    curves: List[np.ndarray | None] = [None] * len(flat_points)
+    for count in np.unique(segments):
+        indices = np.flatnonzero(segments == count)
+        for index, curve in zip(indices, bezier_curves(flat_points[indices], int(count) + 1)):
+            curves[index] = curve
+    return curves
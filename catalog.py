@@ -0,0 +1,175 @@
+"""
+Catalog of a base form folder.
+
+    <folder>/.catalog/catalog.json      one entry per form file (mtime, size, sha256 and summary)
+    <folder>/.catalog/<sha256>.png      thumbnail of every form content
+
+The catalog is updated incrementally: forms are only loaded again when their size or mtime changed and their
+content hash is new, so listing and filtering forms only reads the catalog file instead of every form.
+Form files are read with numpy only. Pickled forms are never unpickled by the catalog (that would run code of
+files nobody opened), they are only listed by name until they get migrated to form files.
+"""
+import json
+import os
+from typing import Dict, List, Iterable
+
+import numpy as np
+
+from compiled_form import CompiledForm, load_compiled_form
+from consts import FILE_SUFFIX, LEGACY_FILE_SUFFIX, BodyPart, BodyFeature
+from exporter import FORM_SIZE, save_png
+from rasterizer import rasterize_form
+from shards import file_checksum
+
+CATALOG_FOLDER = ".catalog"
+CATALOG_FILE = "catalog.json"
+CATALOG_VERSION = 1
+THUMBNAIL_SIZE = (64, 64)
+
+
+def summarize_form(compiled_form: CompiledForm) -> dict:
+    """
+    Collects the meta data of a form that is needed to choose forms without loading them.
+    :param compiled_form: to summarize
+    :return: json serializable summary
+    """
+    body_parts = int(np.bitwise_or.reduce(compiled_form.body_parts, initial=0))
+    body_features = int(np.bitwise_or.reduce(compiled_form.body_features, initial=0))
+    return {
+        "points": compiled_form.form_point_count,
+        "lines": len(compiled_form.lines),
+        "curves": int(np.count_nonzero(compiled_form.curves)),
+        "stats": compiled_form.stats.to_dict(),
+        "body_parts": [part.name for part in BodyPart if body_parts & part.value],
+        "body_features": [feature.name for feature in BodyFeature if body_features & feature.value],
+    }
+
+
+def render_thumbnail(compiled_form: CompiledForm, size=THUMBNAIL_SIZE) -> np.ndarray:
+    """
+    Renders the base positions of the form.
+    :param compiled_form: to render
+    :param size: of the thumbnail
+    :return: (H, W) uint8 image
+    """
+    return rasterize_form(compiled_form, compiled_form.base[np.newaxis], size, size[0] / FORM_SIZE[0])[0]
+
+
+class Catalog:
+    """
+    Summaries and thumbnails of all forms in a folder.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.catalog_folder = os.path.join(folder, CATALOG_FOLDER)
+        # file name -> catalog entry
+        self.entries: Dict[str, dict] = self.read()
+
+    def read(self) -> Dict[str, dict]:
+        path = os.path.join(self.catalog_folder, CATALOG_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r") as f:
+            catalog = json.load(f)
+        if catalog.get("version") != CATALOG_VERSION:
+            return {}
+        return catalog["entries"]
+
+    def write(self):
+        os.makedirs(self.catalog_folder, exist_ok=True)
+        path = os.path.join(self.catalog_folder, CATALOG_FILE)
+        # Written next to the catalog and swapped in, so readers never see a half written catalog
+        with open(path + ".tmp", "w") as f:
+            json.dump({"version": CATALOG_VERSION, "entries": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def update(self) -> bool:
+        """
+        Brings the catalog up to date with the form files of the folder.
+        :return: true if anything changed
+        """
+        files = set()
+        changed = False
+        with os.scandir(self.folder) as scan:
+            for file in scan:
+                if file.is_file() and file.name.endswith((FILE_SUFFIX, LEGACY_FILE_SUFFIX)):
+                    files.add(file.name)
+                    changed |= self.update_entry(file.name, file.stat())
+        for name in set(self.entries) - files:
+            del self.entries[name]
+            changed = True
+        if changed:
+            self.write()
+        return changed
+
+    def update_file(self, file: str):
+        """
+        Updates the entry of a single form file of the folder, e.g. after saving it.
+        :param file: path of the form file
+        """
+        name = os.path.basename(file)
+        if self.update_entry(name, os.stat(os.path.join(self.folder, name))):
+            self.write()
+
+    def update_entry(self, name: str, stat: os.stat_result) -> bool:
+        entry = self.entries.get(name)
+        if entry is not None and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return False
+        if name.endswith(LEGACY_FILE_SUFFIX):
+            self.entries[name] = {"legacy": True, "mtime": stat.st_mtime_ns, "size": stat.st_size}
+            return True
+
+        path = os.path.join(self.folder, name)
+        checksum = file_checksum(path)
+        if entry is None or entry["sha256"] != checksum:
+            try:
+                compiled_form = load_compiled_form(path)
+            except Exception as ex:
+                print(f"Skipping {name} in catalog:", ex)
+                self.entries.pop(name, None)
+                return entry is not None
+            thumbnail = os.path.join(self.catalog_folder, checksum + ".png")
+            if not os.path.exists(thumbnail):
+                os.makedirs(self.catalog_folder, exist_ok=True)
+                save_png(render_thumbnail(compiled_form), thumbnail, compiled_form.stats)
+            entry = dict(summarize_form(compiled_form), sha256=checksum)
+        self.entries[name] = dict(entry, mtime=stat.st_mtime_ns, size=stat.st_size)
+        return True
+
+    def get_names(self) -> List[str]:
+        return sorted(self.entries)
+
+    def get_path(self, name: str) -> str:
+        return os.path.join(self.folder, name)
+
+    def is_legacy(self, name: str) -> bool:
+        return self.entries[name].get("legacy", False)
+
+    def get_thumbnail_path(self, name: str) -> str:
+        return os.path.join(self.catalog_folder, self.entries[name]["sha256"] + ".png")
+
+    def filter(self, body_parts: Iterable[str] = (), min_points: int = 0, max_points: int | None = None,
+               curves: bool | None = None) -> List[str]:
+        """
+        Selects forms by their summary.
+        :param body_parts: names of the body parts the form needs to have
+        :param min_points: the form needs to have at least
+        :param max_points: the form is allowed to have at most (no limit when None)
+        :param curves: if the form needs curves (True), must not have curves (False) or both (None)
+        :return: matching file names, pickled forms are left out as they have no summary
+        """
+        body_parts = set(body_parts)
+        names = []
+        for name in self.get_names():
+            entry = self.entries[name]
+            if self.is_legacy(name):
+                continue
+            if not body_parts.issubset(entry["body_parts"]) or entry["points"] < min_points:
+                continue
+            if max_points is not None and entry["points"] > max_points:
+                continue
+            if curves is not None and (entry["curves"] > 0) != curves:
+                continue
+            names.append(name)
+        return names
@@ -0,0 +1,162 @@
+"""
+Command line entry point for running chalkling jobs without the editor window.
+
+Example:
+    python -m chalkling export --form base_forms/tortoise.npz --copies 100000 --out data/tortoise
+"""
+import argparse
+import os
+import sys
+from typing import List
+
+# Rendering only needs off-screen surfaces, so never try to open a real display.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from array_dataset import pack_png_folders, pack_shards
+from bezier import BEZIER_TOLERANCE
+from catalog import Catalog
+from compiled_form import load_compiled_form, migrate_form
+from consts import BodyPart
+from exporter import Exporter, EXPORT_SIZE, DEFAULT_COMPRESS_LEVEL, RASTERIZERS, save_png
+from shards import DEFAULT_SHARD_SIZE, INDEX_FILE
+from telemetry import ExportTelemetry, format_record
+
+
+def export(args: argparse.Namespace) -> int:
+    form = load_compiled_form(args.form)
+    save_folder = args.out
+    if save_folder is None:
+        save_folder = os.path.join("data", os.path.basename(args.form).split(".")[0])
+
+    workers = args.workers if args.workers > 0 else os.cpu_count()
+    if args.resume:
+        print(f"resuming the export of {args.form} to {save_folder} with {workers} workers..")
+    else:
+        print(f"exporting {args.form} to {save_folder} with {workers} workers..")
+    exporter = Exporter(form, size=(args.size, args.size), tolerance=args.tolerance,
+                        grayscale=args.grayscale, compress_level=args.compress_level, rasterizer=args.rasterizer)
+    telemetry = ExportTelemetry(args.telemetry, lambda record: print(format_record(record), file=sys.stderr))
+    if args.format == "shards":
+        label = args.label if args.label is not None else os.path.basename(args.form).split(".")[0]
+        exporter.export_shards(save_folder, args.copies, label, seed=args.seed, workers=workers,
+                               shard_size=args.shard_size, telemetry=telemetry)
+    elif args.resume:
+        if exporter.resume(save_folder, workers=workers, telemetry=telemetry) is None:
+            print(f"{save_folder} has no unfinished export to resume")
+    else:
+        exporter.export(save_folder, args.copies, seed=args.seed, workers=workers, telemetry=telemetry)
+    return 0
+
+
+def pack(args: argparse.Namespace) -> int:
+    print(f"packing {args.data} into {args.out}..")
+    if os.path.exists(os.path.join(args.data, INDEX_FILE)):
+        count = pack_shards(args.data, args.out)
+    else:
+        count = pack_png_folders(args.data, args.out)
+    print(f"..{count} samples packed")
+    return 0
+
+
+def migrate(args: argparse.Namespace) -> int:
+    for file in args.forms:
+        print(f"{file} -> {migrate_form(file)}")
+    return 0
+
+
+def catalog(args: argparse.Namespace) -> int:
+    forms = Catalog(args.forms)
+    forms.update()
+    for name in forms.filter(args.body_part, args.min_points, args.max_points):
+        entry = forms.entries[name]
+        print(f"{forms.get_path(name)}\t{entry['points']} points\t{entry['lines']} lines\t"
+              f"{','.join(entry['body_parts'])}")
+    legacy = [name for name in forms.get_names() if forms.is_legacy(name)]
+    if len(legacy) > 0:
+        print(f"{len(legacy)} pickled forms are not summarized, convert them with 'chalkling migrate': "
+              f"{', '.join(legacy)}", file=sys.stderr)
+    return 0
+
+
+def regenerate(args: argparse.Namespace) -> int:
+    exporter = Exporter(load_compiled_form(args.form), size=(args.size, args.size), tolerance=args.tolerance,
+                        grayscale=args.grayscale, compress_level=args.compress_level, rasterizer=args.rasterizer)
+    stats, pixels = exporter.render_variant(args.seed, args.variant)
+    save_png(pixels, args.out, stats, args.compress_level, exporter.get_sample_meta(args.seed, args.variant))
+    print(f"variant {args.variant} of seed {args.seed} written to {args.out}")
+    return 0
+
+
+def add_render_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--size", type=int, default=EXPORT_SIZE[0], help="width and height of the images")
+    parser.add_argument("--tolerance", type=float, default=BEZIER_TOLERANCE,
+                        help="max pixel distance between tessellated and real bezier curves")
+    parser.add_argument("--rasterizer", choices=RASTERIZERS, default="pygame",
+                        help="draw with pygame or with the batched antialiased numpy rasterizer")
+    parser.add_argument("--grayscale", action="store_true", help="write single channel images")
+    parser.add_argument("--compress-level", type=int, default=DEFAULT_COMPRESS_LEVEL,
+                        help="zlib compression level of the png files (0-9)")
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="chalkling", description="Headless chalkling-o-mat tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="render variants of a base form into a dataset folder")
+    export_parser.add_argument("--form", required=True, help="base form file to generate the variants from")
+    export_parser.add_argument("--copies", type=int, default=10, help="number of variants to export")
+    export_parser.add_argument("--out", default=None, help="output folder (default: data/<form name>)")
+    add_render_arguments(export_parser)
+    export_parser.add_argument("--format", choices=["png", "shards"], default="png",
+                               help="one png per variant or packed tar shards with an index")
+    export_parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE, help="variants per shard")
+    export_parser.add_argument("--label", default=None, help="label stored in the shards (default: form name)")
+    export_parser.add_argument("--seed", type=int, default=None, help="job seed (default: random)")
+    export_parser.add_argument("--workers", type=int, default=1, help="worker processes, 0 uses all cores")
+    export_parser.add_argument("--resume", action="store_true",
+                               help="finish the last interrupted png export of the output folder")
+    export_parser.add_argument("--telemetry", default=None,
+                               help="JSON-lines file to append the stage timings and the progress to")
+    export_parser.set_defaults(func=export)
+
+    regenerate_parser = commands.add_parser("regenerate", help="render a single exported variant again")
+    regenerate_parser.add_argument("--form", required=True, help="base form the variant was generated from")
+    regenerate_parser.add_argument("--seed", type=int, required=True, help="seed of the export job")
+    regenerate_parser.add_argument("--variant", type=int, required=True, help="variant index within the job")
+    regenerate_parser.add_argument("--out", required=True, help="png file to write")
+    add_render_arguments(regenerate_parser)
+    regenerate_parser.set_defaults(func=regenerate)
+
+    pack_parser = commands.add_parser("pack", help="pack a png or shard dataset into memory mappable arrays")
+    pack_parser.add_argument("--data", default="data",
+                             help="png dataset with one folder per label or a sharded dataset folder")
+    pack_parser.add_argument("--out", required=True, help="folder for the packed arrays")
+    pack_parser.set_defaults(func=pack)
+
+    catalog_parser = commands.add_parser("catalog", help="update the catalog of a form folder and list its forms")
+    catalog_parser.add_argument("--forms", default="base_forms", help="folder of the base forms")
+    catalog_parser.add_argument("--body-part", action="append", default=[], choices=[part.name for part in BodyPart],
+                                help="only list forms with this body part (can be repeated)")
+    catalog_parser.add_argument("--min-points", type=int, default=0,
+                                help="only list forms with at least this many points")
+    catalog_parser.add_argument("--max-points", type=int, default=None,
+                                help="only list forms with at most this many points")
+    catalog_parser.set_defaults(func=catalog)
+
+    migrate_parser = commands.add_parser("migrate", help="convert pickled base forms into form files")
+    migrate_parser.add_argument("forms", nargs="+", help="pickled base forms, the form files are written next to them")
+    migrate_parser.set_defaults(func=migrate)
+    return parser
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    if args.command == "export" and args.resume and args.format == "shards":
+        parser.error("--resume only finishes png exports, shard exports can't be resumed")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,403 @@
+import copy
+import hashlib
+import os
+from enum import Enum
+from typing import List, Tuple, Dict, Iterable, TYPE_CHECKING
+
+import numpy as np
+
+from bezier import adaptive_bezier_curves, bezier_curves, flatness_segments, BEZIER_TOLERANCE
+from form_file import FORM_ARRAYS, FORM_SUFFIX, LEGACY_FORM_SUFFIX, read_form_file, write_form_file
+from stats import Stats
+
+# Loading and sampling form files only needs numpy. The editor classes (and with them pygame and pygame_gui)
+# are imported where a form gets converted from or to them and where a variant is drawn with pygame.
+if TYPE_CHECKING:
+    from pygame import Surface
+    from base_form import BaseForm
+
+
+def get_bit_mask(flags: Iterable[Enum]) -> int:
+    """
+    Combines flags like BodyPart, whose values are single bits, into a bit mask. Flags that are listed twice
+    don't change the mask.
+    :param flags: to combine
+    :return: bit mask
+    """
+    mask = 0
+    for flag in flags:
+        mask |= flag.value
+    return mask
+
+
+class CompiledForm:
+    """
+    Flat array representation of a base form that is used to generate many variants at once.
+
+    All points of the form are stored once, lines reference them by index. That way points shared by
+    several lines are only sampled once per variant. Copying, scaling and storing the form are plain
+    array operations, the editor objects can be rebuilt with to_base_form.
+    """
+    # Arrays that fully describe the form (see get_arrays)
+    ARRAYS = FORM_ARRAYS
+
+    def __init__(self, form: "BaseForm"):
+        self.stats = form.stats
+        points = list(form.points)
+        index = {id(point): i for i, point in enumerate(points)}
+        for line in form.lines:
+            for point in (line.point_a, line.point_b):
+                if id(point) not in index:
+                    index[id(point)] = len(points)
+                    points.append(point)
+        # Number of points that belong to form.points (the rest are only referenced by lines)
+        self.form_point_count = len(form.points)
+
+        # (P, 2) arrays of the editor position, the base position and the variance bounds
+        self.positions = np.array([p.get_pos() for p in points], dtype=np.float64).reshape(-1, 2)
+        self.base = np.array([(p.settings.base_x, p.settings.base_y) for p in points], dtype=np.float64).reshape(-1, 2)
+        self.variance_min = np.array([(p.settings.pos_variance_x_min, p.settings.pos_variance_y_min) for p in points],
+                                     dtype=np.float64).reshape(-1, 2)
+        self.variance_max = np.array([(p.settings.pos_variance_x_max, p.settings.pos_variance_y_max) for p in points],
+                                     dtype=np.float64).reshape(-1, 2)
+
+        # (L, 2) point indices, (L, 2, 2) bezier handles, (L,) widths and curve flags
+        self.lines = np.array([(index[id(line.point_a)], index[id(line.point_b)]) for line in form.lines],
+                              dtype=np.intp).reshape(-1, 2)
+        self.handles = np.array([(line.point_a_bezier.get_pos(), line.point_b_bezier.get_pos())
+                                 for line in form.lines], dtype=np.float64).reshape(-1, 2, 2)
+        self.widths = np.array([int(line.width) for line in form.lines], dtype=np.int32)
+        self.curves = np.array([line.settings.curve for line in form.lines], dtype=bool)
+
+        # (L, 2) width variance and (L,) bit masks of the body parts and features (see BodyPart, BodyFeature)
+        self.width_variance = np.array([(line.settings.width_variance_min, line.settings.width_variance_max)
+                                        for line in form.lines], dtype=np.float64).reshape(-1, 2)
+        self.body_parts = np.array([get_bit_mask(line.settings.body_parts) for line in form.lines], dtype=np.int32)
+        self.body_features = np.array([get_bit_mask(line.settings.body_features) for line in form.lines],
+                                      dtype=np.int32)
+        self._form_id: int | None = None
+
+    def __len__(self):
+        return len(self.base)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], form_point_count: int, stats: Stats) -> "CompiledForm":
+        """
+        Creates a form from its arrays without going through the editor objects.
+        :param arrays: with all names of ARRAYS (see get_arrays)
+        :param form_point_count: number of points that belong to the form
+        :param stats: of the form
+        :return: the form
+        """
+        compiled_form = cls.__new__(cls)
+        compiled_form.stats = stats
+        compiled_form.form_point_count = form_point_count
+        for name in cls.ARRAYS:
+            setattr(compiled_form, name, np.asarray(arrays[name]))
+        compiled_form._form_id = None
+        return compiled_form
+
+    def get_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def copy(self) -> "CompiledForm":
+        return CompiledForm.from_arrays({name: array.copy() for name, array in self.get_arrays().items()},
+                                        self.form_point_count, copy.copy(self.stats))
+
+    def scale(self, factor: float):
+        """
+        Scales all positions and handles like BaseForm.scale does, the variance bounds stay untouched.
+        :param factor: to scale with
+        """
+        self.positions *= factor
+        self.base *= factor
+        self.handles *= factor
+        self._form_id = None
+
+    def to_base_form(self) -> "BaseForm":
+        """
+        Rebuilds the editor objects of the form.
+        :return: editable base form
+        """
+        from pygame import Vector2
+        from base_form import BaseForm
+        from consts import BodyPart, BodyFeature
+        from line import Line, LineSetting
+        from point import Point, PointSetting
+
+        form = BaseForm()
+        form.stats = copy.copy(self.stats)
+        points = []
+        for position, base, low, high in zip(self.positions.tolist(), self.base.tolist(),
+                                              self.variance_min.tolist(), self.variance_max.tolist()):
+            point = Point(Vector2(position), PointSetting(low[0], high[0], low[1], high[1]))
+            point.settings.set_base(base)
+            points.append(point)
+        form.points = points[:self.form_point_count]
+
+        for (a, b), handles, width, curve, width_variance, body_parts, body_features in zip(
+                self.lines.tolist(), self.handles.tolist(), self.widths.tolist(), self.curves.tolist(),
+                self.width_variance.tolist(), self.body_parts.tolist(), self.body_features.tolist()):
+            settings = LineSetting()
+            settings.width_variance_min, settings.width_variance_max = width_variance
+            settings.body_parts = [part for part in BodyPart if body_parts & part.value]
+            settings.body_features = [feature for feature in BodyFeature if body_features & feature.value]
+            settings.curve = curve
+            line = Line(points[a], points[b], settings)
+            line.point_a_bezier.set_pos(handles[0])
+            line.point_b_bezier.set_pos(handles[1])
+            line.width = width
+            form.lines.append(line)
+
+        form.add_selectables(form.points)
+        form.add_selectables([selectable for line in form.lines
+                              for selectable in (line, line.point_a_bezier, line.point_b_bezier)])
+        return form
+
+    def get_sample_bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Bounds the positions are sampled in. Only points that are part of a line get regenerated,
+        all others stay at their base.
+        :return: (P, 2) low and high bounds
+        """
+        movable = np.zeros(len(self.base), dtype=bool)
+        movable[self.lines.ravel()] = True
+        movable = movable[:, np.newaxis]
+        return (self.base + np.where(movable, self.variance_min, 0),
+                self.base + np.where(movable, self.variance_max, 0))
+
+    def get_deviation(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Measures how far variants deviate from the base form. The offset of every sampled point from the center
+        of its variance box is normalized by the half size of the box, so each point contributes a value between
+        0 (center) and 1 (corner) no matter how big its variance is. Runs in O(N * P).
+        :param positions: (N, P, 2) positions of the variants
+        :return: (N,) mean deviation of the sampled points of every variant
+        """
+        low, high = self.get_sample_bounds()
+        half_size = (high - low) / 2
+        sampled = np.any(half_size > 0, axis=-1)
+        if not np.any(sampled):
+            return np.zeros(len(positions))
+        half_size = half_size[sampled]
+        offset = positions[:, sampled] - ((low + high) / 2)[sampled]
+        normalized = np.divide(offset, half_size, out=np.zeros_like(offset), where=half_size > 0)
+        # Axes without variance don't count, so a point that can only move along one axis still reaches 1
+        axes = np.count_nonzero(half_size > 0, axis=-1)
+        point_deviation = np.sqrt((normalized ** 2).sum(axis=-1) / axes)
+        # The fancy indexing leaves the array column major. Reducing contiguous rows sums every variant in the
+        # same order no matter how many variants the batch has, so a variant always gets the same stats
+        return np.ascontiguousarray(point_deviation).mean(axis=-1)
+
+    def get_form_id(self) -> int:
+        """
+        Id derived from everything that influences the variants, the same form always gets the same id.
+        :return: 64 bit form id
+        """
+        if self._form_id is None:
+            checksum = hashlib.sha256()
+            for array in (self.base, self.variance_min, self.variance_max, self.lines, self.handles, self.widths,
+                          self.curves):
+                checksum.update(np.ascontiguousarray(array).tobytes())
+            self._form_id = int.from_bytes(checksum.digest()[:8], "little")
+        return self._form_id
+
+    def get_variant_rng(self, seed: int, index: int) -> np.random.Generator:
+        """
+        Counter based random stream of a single variant derived from (dataset seed, form id, variant index).
+        :param seed: of the dataset
+        :param index: of the variant
+        :return: random generator of the variant
+        """
+        return np.random.Generator(np.random.Philox(np.random.SeedSequence([seed, self.get_form_id(), index])))
+
+    def sample_indexed(self, seed: int, indices: Iterable[int]) -> np.ndarray:
+        """
+        Samples one variant per index, each from its own random stream (see get_variant_rng).
+        The result for an index does not depend on which other indices are sampled with it.
+        :param seed: of the dataset
+        :param indices: variant indices to sample
+        :return: (N, P, 2) array of positions
+        """
+        low, high = self.get_sample_bounds()
+        # Only the draws need the stream of every variant, the positions are scaled for the whole batch at once
+        # (the same low + (high - low) * u as Generator.uniform)
+        draws = [self.get_variant_rng(seed, index).random(self.base.shape) for index in indices]
+        if len(draws) == 0:
+            return np.empty((0,) + self.base.shape, dtype=np.float64)
+        return low + (high - low) * np.stack(draws)
+
+    def create_variant(self, seed: int, index: int = 0) -> "FormVariant":
+        """
+        Samples a single variant that shares everything but its positions with this form.
+        :param seed: of the dataset
+        :param index: of the variant
+        :return: the new variant
+        """
+        return FormVariant(self, self.sample_indexed(seed, [index])[0])
+
+    def get_form_points(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Selects the positions of the points that belong to the original form (same order as BaseForm.to_numpy).
+        :param positions: (..., P, 2) positions
+        :return: (..., form points, 2) positions
+        """
+        return positions[..., :self.form_point_count, :]
+
+    def get_control_points(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Builds the bezier control points of all curved lines.
+        :param positions: (..., P, 2) positions of one or many variants
+        :return: (..., curved lines, 4, 2) control points
+        """
+        curved_lines = self.lines[self.curves]
+        handles = self.handles[self.curves]
+        point_a = positions[..., curved_lines[:, 0], :]
+        point_b = positions[..., curved_lines[:, 1], :]
+        handle_a = np.broadcast_to(handles[:, 0], point_a.shape)
+        handle_b = np.broadcast_to(handles[:, 1], point_b.shape)
+        return np.stack([point_a, handle_a, handle_b, point_b], axis=-2)
+
+    def tessellate(self, positions: np.ndarray, scale_factor: float = 1.0,
+                   tolerance: float = BEZIER_TOLERANCE) -> List[List[np.ndarray]]:
+        """
+        Evaluates the bezier curves of all curved lines for many variants at once. The curves are
+        tessellated adaptively in the scaled target space.
+        :param positions: (N, P, 2) positions
+        :param scale_factor: of the target surface
+        :param tolerance: max distance in target pixels between the tessellated and the real curve
+        :return: for every variant a list with one (T, 2) curve per curved line
+        """
+        curve_count = int(np.count_nonzero(self.curves))
+        if curve_count == 0:
+            return [[] for _ in range(len(positions))]
+        curves = adaptive_bezier_curves(self.get_control_points(positions) * scale_factor, tolerance)
+        return [curves[i:i + curve_count] for i in range(0, len(curves), curve_count)]
+
+    def get_segments(self, positions: np.ndarray, scale_factor: float = 1.0,
+                     tolerance: float = BEZIER_TOLERANCE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Builds the line segments of many variants in the scaled target space. Every variant tessellates a
+        curve with the segments it needs itself, so its segments don't depend on the other variants of the
+        batch. Variants that need fewer segments than the others repeat their segments, so the result is one
+        dense array. Repeated segments don't change the rasterized strokes.
+        :param positions: (N, P, 2) positions
+        :param scale_factor: of the target space
+        :param tolerance: max distance in target pixels between the tessellated and the real curve
+        :return: (N, S, 2, 2) start and end points and (S,) widths of all segments
+        """
+        scaled = positions * scale_factor
+        straight_lines = self.lines[~self.curves]
+        segments = [scaled[:, straight_lines]]
+        widths = [self.widths[~self.curves]]
+
+        control_points = self.get_control_points(positions) * scale_factor
+        if control_points.shape[1] > 0:
+            # (N, C) segments every variant needs per curve
+            variant_segments = flatness_segments(control_points, tolerance)
+            for curve_index, width in enumerate(self.widths[self.curves]):
+                counts = variant_segments[:, curve_index]
+                max_count = int(counts.max())
+                curve_segments = np.empty((len(positions), max_count, 2, 2))
+                for count in np.unique(counts).tolist():
+                    variants = np.flatnonzero(counts == count)
+                    curve = bezier_curves(control_points[variants, curve_index], count + 1)
+                    # Segment i of every variant lies at about the same part of the curve, which keeps the
+                    # bounding boxes of the rasterizer small
+                    repeated = np.arange(max_count) * count // max_count
+                    curve_segments[variants] = np.stack([curve[:, repeated], curve[:, repeated + 1]], axis=2)
+                segments.append(curve_segments)
+                widths.append(np.full(max_count, width))
+        return np.concatenate(segments, axis=1), np.concatenate(widths)
+
+    def render(self, surface: "Surface", positions: np.ndarray, scale_factor: float = 1.0,
+               curves: List[np.ndarray] | None = None, tolerance: float = BEZIER_TOLERANCE):
+        """
+        Renders one variant the same way BaseForm.render does.
+        :param surface: to render to
+        :param positions: (P, 2) positions of the variant
+        :param scale_factor: to scale positions and handles with
+        :param curves: already tessellated and scaled curves of the variant (see tessellate)
+        :param tolerance: max distance in target pixels used when the curves have to be tessellated
+        """
+        import pygame
+        from consts import WHITE
+
+        if curves is None:
+            curves = self.tessellate(positions[np.newaxis], scale_factor, tolerance)[0]
+        scaled = (positions * scale_factor).tolist()
+        scaled_curves = iter(curves)
+        for (a, b), width, curve in zip(self.lines, self.widths.tolist(), self.curves):
+            if curve:
+                curve_points = next(scaled_curves).tolist()
+                for prev_point, curve_point in zip(curve_points, curve_points[1:]):
+                    pygame.draw.line(surface, WHITE, prev_point, curve_point, width)
+            else:
+                pygame.draw.line(surface, WHITE, scaled[a], scaled[b], width)
+
+
+class FormVariant:
+    """
+    Light weight variant of a form. The topology and settings are shared with the compiled form,
+    the variant only owns its (P, 2) positions. Scaling happens while rendering.
+    """
+
+    def __init__(self, compiled_form: CompiledForm, positions: np.ndarray):
+        self.compiled_form = compiled_form
+        self.positions = positions
+
+    def render(self, surface: "Surface", scale_factor: float = 1.0, tolerance: float = BEZIER_TOLERANCE):
+        self.compiled_form.render(surface, self.positions, scale_factor, tolerance=tolerance)
+
+    def to_numpy(self) -> np.ndarray:
+        return self.compiled_form.get_form_points(self.positions)
+
+
+def load_compiled_form(file: str) -> CompiledForm:
+    """
+    Loads a form file (see form_file.py) straight into arrays, pickled forms of older versions are converted.
+    :param file: path of the form file or pickled form
+    :return: the loaded form
+    """
+    # Only files with the legacy suffix get unpickled, anything else has to be a form file
+    if file.endswith(LEGACY_FORM_SUFFIX):
+        from base_form import load_pickled_form
+        return CompiledForm(load_pickled_form(file))
+    form_file = read_form_file(file)
+    return CompiledForm.from_arrays(form_file.arrays, form_file.form_point_count, Stats.from_dict(form_file.stats))
+
+
+def save_compiled_form(compiled_form: CompiledForm, file: str):
+    write_form_file(file, compiled_form.get_arrays(), compiled_form.form_point_count, compiled_form.stats.to_dict())
+
+
+def load_form(file: str) -> "BaseForm":
+    """
+    Loads a base form for editing.
+    :param file: path of the form file or pickled form
+    :return: the loaded base form
+    """
+    if file.endswith(LEGACY_FORM_SUFFIX):
+        from base_form import load_pickled_form
+        return load_pickled_form(file)
+    return load_compiled_form(file).to_base_form()
+
+
+def save_form(form: "BaseForm", file: str):
+    """
+    Stores the base form as form file.
+    :param form: to store
+    :param file: path to store the form at
+    """
+    save_compiled_form(CompiledForm(form), file)
+
+
+def migrate_form(file: str) -> str:
+    """
+    Converts a pickled base form into a form file next to it.
+    :param file: path of the pickled form
+    :return: path of the form file
+    """
+    form_file = os.path.splitext(file)[0] + FORM_SUFFIX
+    save_compiled_form(load_compiled_form(file), form_file)
+    return form_file
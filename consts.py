@@ -2,6 +2,8 @@ from enum import Enum
 
 from pygame import USEREVENT
 
+from form_file import FORM_SUFFIX, LEGACY_FORM_SUFFIX
+
 # Colors
 WHITE = (255, 255, 255)
 YELLOW = (255, 255, 0)
@@ -18,7 +20,10 @@ NUM_CHARACTERS = ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9', '-', '.']
 POINT_SIZE = 5
 WINDOW_WIDTH = 900
 WINDOW_HEIGHT = 800
-FILE_SUFFIX = ".pickle"
+FILE_SUFFIX = FORM_SUFFIX
+LEGACY_FILE_SUFFIX = LEGACY_FORM_SUFFIX
+# Milliseconds without edits before the previews get regenerated
+PREVIEW_DEBOUNCE = 100
 
 # Events
 MY_EVENTS = USEREVENT + 100
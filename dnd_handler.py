@@ -9,6 +9,8 @@ from event_dispatcher import EventDispatcher
 
 
 class DragAble:
+    __slots__ = ()
+
     @abstractmethod
     def move(self, direction: Vector2, already_moved: List[any]):
         """
@@ -63,8 +65,16 @@ class DragAndDropHandler:
             if dragged_object not in already_moved_objects:
                 dragged_object.move(direction, already_moved_objects)
         self._previous_position = event.pos
+        self.on_moved(already_moved_objects)
         return True
 
+    def on_moved(self, moved_objects: List[DragAble]):
+        """
+        Called after the dragged objects have been moved.
+        :param moved_objects: all objects that got moved
+        """
+        pass
+
     def stop_drag(self) -> bool:
         """
         Stop dragging process.
@@ -1,32 +1,147 @@
-from typing import Callable, Iterable, List
+import heapq
+import itertools
+import time
+from typing import Callable, Iterable, List, Dict, Tuple
 
+import pygame
 from pygame.event import Event
 from pygame_gui.core import UIElement
 
+from profiler import FrameProfiler, get_listener_name
+
+# (registration number, listener)
+Listener = Tuple[int, Callable[[Event], bool]]
+
+
+class CoalescedListener:
+    """
+    Remembers the latest event of a coalesced listener until the dispatcher flushes it. The values of the
+    events that came in before are merged into it, so e.g. the seed of a REGENERATE event is not lost when an
+    edit follows within the debounce time. Values of later events win.
+    """
+
+    def __init__(self, listener: Callable[[Event], bool], debounce: int):
+        self.listener = listener
+        self.debounce = debounce
+        self.pending: Event | None = None
+        self.last_event_time: int = 0
+
+    def on_event(self, event: Event) -> bool:
+        if self.pending is not None:
+            event = Event(event.type, {**self.pending.dict, **event.dict})
+        self.pending = event
+        self.last_event_time = pygame.time.get_ticks()
+        return False
+
+    def flush(self, now: int):
+        if self.pending is not None and now - self.last_event_time >= self.debounce:
+            event = self.pending
+            self.pending = None
+            self.listener(event)
+
 
 class EventDispatcher:
+    """
+    Dispatches events to listeners in registration order until one of them returns True.
+
+    Listeners are indexed by event type and element, so an event only reaches the listeners that can match it.
+    """
 
     def __init__(self):
-        self._listeners: [Callable[[Event], bool]] = []
+        # event type (None = all types) -> element (None = all elements) -> listeners in registration order
+        self._listeners: Dict[int | None, Dict[UIElement | None, List[Listener]]] = {}
+        self._counter = itertools.count()
+        self._coalesced: List[CoalescedListener] = []
+        self._observers: List[Callable[[Event], None]] = []
+        # Times every listener when set (see profiler.py)
+        self.profiler: FrameProfiler | None = None
 
     def listen(self, listener: Callable[[Event], bool], element: UIElement = None, event_type: int | None = None):
-        def filtered_listener(event: Event):
-            no_element = element is None
-            element_is_target = (hasattr(event, "target") and event.target == element) or \
-                                (hasattr(event, "ui_element") and event.ui_element == element)
-            no_event_type = event_type is None
-            event_type_equals = event_type == event.type
-
-            if (no_element or element_is_target) and (no_event_type or event_type_equals):
-                return listener(event)
-
-        self._listeners.append(filtered_listener)
+        by_element = self._listeners.setdefault(event_type, {})
+        by_element.setdefault(element, []).append((next(self._counter), listener))
+
+    def listen_coalesced(self, listener: Callable[[Event], bool], event_types: Iterable[int], debounce: int = 0):
+        """
+        Registers a listener that gets called at most once per flush with the latest matching event, no matter
+        how many events came in. The latest event carries the values of the earlier ones it replaced (see
+        CoalescedListener). The events are not consumed, so other listeners still get them.
+        :param listener: to call on flush
+        :param event_types: that trigger the listener
+        :param debounce: milliseconds without new events before the listener gets called (0 = next flush)
+        """
+        coalesced = CoalescedListener(listener, debounce)
+        self._coalesced.append(coalesced)
+        for event_type in event_types:
+            self.listen(coalesced.on_event, event_type=event_type)
+
+    def observe(self, observer: Callable[[Event], None]):
+        """
+        Registers an observer that sees every event before the listeners, so it can not miss events that get
+        consumed. Observers can not consume events themselves.
+        :param observer: to call with every event
+        """
+        self._observers.append(observer)
+
+    def flush(self):
+        """
+        Calls all coalesced listeners with pending events, should be called once per frame after the events
+        have been processed.
+        """
+        now = pygame.time.get_ticks()
+        for coalesced in self._coalesced:
+            if self.profiler is None or coalesced.pending is None:
+                coalesced.flush(now)
+            else:
+                start = time.perf_counter()
+                coalesced.flush(now)
+                self.profiler.add_listener(get_listener_name(coalesced.listener), time.perf_counter() - start)
+
+    def get_listeners(self, event: Event) -> Iterable[Listener]:
+        """
+        Collects the listeners that match the event.
+        :param event: to find the listeners for
+        :return: matching listeners in registration order
+        """
+        elements = [None]
+        for attribute in ("target", "ui_element"):
+            element = getattr(event, attribute, None)
+            if element is not None and element not in elements:
+                elements.append(element)
+
+        candidates = []
+        for event_type in (event.type, None):
+            by_element = self._listeners.get(event_type)
+            if by_element is None:
+                continue
+            for element in elements:
+                listeners = by_element.get(element)
+                if listeners:
+                    candidates.append(listeners)
+
+        if len(candidates) == 1:
+            return candidates[0]
+        return heapq.merge(*candidates, key=lambda entry: entry[0])
 
     def process_event(self, event: Event):
-        for listener in self._listeners:
+        if self.profiler is not None:
+            self.process_event_profiled(event)
+            return
+        for observer in self._observers:
+            observer(event)
+        for _, listener in self.get_listeners(event):
             if listener(event):
                 return
 
+    def process_event_profiled(self, event: Event):
+        for observer in self._observers:
+            observer(event)
+        for _, listener in self.get_listeners(event):
+            start = time.perf_counter()
+            consumed = listener(event)
+            self.profiler.add_listener(get_listener_name(listener), time.perf_counter() - start)
+            if consumed:
+                return
+
 
 def on_change(converter: Callable[[any, Event], None], get_elements: Callable[[], Iterable])\
         -> Callable[[Event], bool]:
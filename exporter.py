@@ -0,0 +1,353 @@
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Tuple, List, BinaryIO, Callable, Iterator, Dict, TYPE_CHECKING
+
+import numpy as np
+import pygame
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+from pygame import Surface
+
+from bezier import BEZIER_TOLERANCE
+from compiled_form import CompiledForm
+from manifest import ExportManifest
+from rasterizer import rasterize_form
+from shards import DEFAULT_SHARD_SIZE, write_shard, get_next_key, append_index
+from stats import Stats
+from telemetry import StageTimer, ExportTelemetry
+
+if TYPE_CHECKING:
+    from base_form import BaseForm
+
+EXPORT_SIZE = (128, 128)
+FORM_SIZE = (512, 512)
+EXPORT_BACKGROUND = (5, 5, 5)
+# Number of variants that get sampled at once
+SAMPLE_BATCH_SIZE = 256
+DEFAULT_COMPRESS_LEVEL = 6
+RASTERIZERS = ["pygame", "numpy"]
+
+
+def create_seed() -> int:
+    return int(np.random.SeedSequence().entropy)
+
+
+def get_next_file_number(folder: str) -> int:
+    """
+    Finds the number after the highest numbered file of the folder, so no existing file gets overwritten.
+    :param folder: to look at
+    :return: next free file number, 0 if the folder has no numbered files
+    """
+    highest_number = -1
+    for file in os.listdir(folder):
+        name, extension = os.path.splitext(file)
+        try:
+            highest_number = max(highest_number, int(name))
+        except ValueError:
+            pass
+    return highest_number + 1
+
+
+def create_meta(stats: Stats, meta: dict | None = None) -> PngInfo:
+    info = PngInfo()
+    for key, value in dict(stats.to_dict(), **(meta or {})).items():
+        info.add_text(key, str(value))
+    return info
+
+
+def get_pixels(surface: Surface, grayscale: bool = False) -> np.ndarray:
+    """
+    Gives access to the pixels of the surface without copying them. The surface stays locked while the
+    returned array is referenced.
+    :param surface: to get the pixels of
+    :param grayscale: only the first channel (the export renders white on black)
+    :return: (H, W) or (H, W, 3) uint8 array
+    """
+    # The pixel arrays are (width, height) so they get transposed
+    if grayscale:
+        return pygame.surfarray.pixels_red(surface).T
+    return pygame.surfarray.pixels3d(surface).transpose(1, 0, 2)
+
+
+def save_png(pixels: np.ndarray, file_path: str | BinaryIO, stats: Stats,
+             compress_level: int = DEFAULT_COMPRESS_LEVEL, meta: dict | None = None):
+    """
+    Encodes the pixels together with the stats as text chunks and writes the png file once.
+    :param pixels: (H, W) grayscale or (H, W, 3) rgb uint8 array
+    :param file_path: of the png file or an open binary file
+    :param stats: stored as text chunks
+    :param compress_level: zlib compression level from 0 (none) to 9 (best)
+    :param meta: additional values stored as text chunks
+    """
+    image = Image.fromarray(pixels)
+    image.save(file_path, "PNG", pnginfo=create_meta(stats, meta), compress_level=compress_level)
+
+
+def encode_png(pixels: np.ndarray, stats: Stats, compress_level: int = DEFAULT_COMPRESS_LEVEL,
+               meta: dict | None = None) -> bytes:
+    buffer = io.BytesIO()
+    save_png(pixels, buffer, stats, compress_level, meta)
+    return buffer.getvalue()
+
+
+def calculate_stats(base_stats: Stats, deviation: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Derives the stats of a batch of variants from their deviation (see CompiledForm.get_deviation).
+    :param base_stats: of the form
+    :param deviation: (N,) deviation of the variants
+    :return: (N,) array per stat
+    """
+    stats = {key: value * deviation for key, value in base_stats.to_dict().items()}
+    stats["aesthetic"] = deviation
+    return stats
+
+
+def split_stats(batch_stats: Dict[str, np.ndarray]) -> List[Stats]:
+    columns = {key: values.tolist() for key, values in batch_stats.items()}
+    return [Stats.from_dict(dict(zip(columns, values))) for values in zip(*columns.values())]
+
+
+class Exporter:
+    """
+    Renders variants of a base form into png files. Works without any window so it can be used by the
+    editor and by headless batch jobs.
+
+    Every copy gets its own random stream derived from (seed, form id, copy index), so the output of a job is
+    the same no matter how many worker processes render it. The three values are stored with every sample,
+    so any sample can be rendered again with render_variant instead of storing it.
+    """
+
+    def __init__(self, form: "BaseForm | CompiledForm", size: Tuple[int, int] = EXPORT_SIZE,
+                 form_size: Tuple[int, int] = FORM_SIZE, tolerance: float = BEZIER_TOLERANCE,
+                 grayscale: bool = False, compress_level: int = DEFAULT_COMPRESS_LEVEL, rasterizer: str = "pygame"):
+        self.compiled_form = form if isinstance(form, CompiledForm) else CompiledForm(form)
+        self.size = size
+        self.surface = Surface(size)
+        self.scale_factor = size[0] / form_size[0]
+        self.background = EXPORT_BACKGROUND
+        self.tolerance = tolerance
+        self.grayscale = grayscale
+        self.compress_level = compress_level
+        self.rasterizer = rasterizer
+
+    def __getstate__(self):
+        # Surfaces can't be pickled, every worker process creates its own one
+        state = vars(self).copy()
+        del state["surface"]
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self.surface = Surface(self.size)
+
+    def render(self, positions: np.ndarray, curves: List[np.ndarray] | None = None) -> np.ndarray:
+        self.surface.fill(self.background)
+        self.compiled_form.render(self.surface, positions, self.scale_factor, curves, self.tolerance)
+        return get_pixels(self.surface, self.grayscale)
+
+    def get_params(self) -> dict:
+        return {"size": list(self.size), "scale_factor": self.scale_factor, "tolerance": self.tolerance,
+                "grayscale": self.grayscale, "compress_level": self.compress_level, "rasterizer": self.rasterizer}
+
+    def export(self, save_folder: str, copies: int, seed: int | None = None, workers: int = 1,
+               telemetry: ExportTelemetry | None = None) -> int:
+        """
+        Exports the given amount of variants into the folder, numbering continues after the last job of the
+        folder manifest (see manifest.py).
+        :param save_folder: to write the png files to
+        :param copies: amount of variants to export
+        :param seed: of the job, a random one is used if none is given
+        :param workers: number of processes to render with
+        :param telemetry: gets the stage timings and the progress of the job
+        :return: number of exported variants
+        """
+        os.makedirs(save_folder, exist_ok=True)
+        manifest = ExportManifest(save_folder)
+        # Folders exported before the manifests existed have to be listed once
+        starts_with = manifest.get_next_index() if manifest.exists() else get_next_file_number(save_folder)
+        if seed is None:
+            seed = create_seed()
+
+        job = manifest.start_job(seed, self.compiled_form.get_form_id(), copies, starts_with, self.get_params())
+        return self.run_job(save_folder, manifest, job, workers, telemetry)
+
+    def resume(self, save_folder: str, workers: int = 1, telemetry: ExportTelemetry | None = None) -> int | None:
+        """
+        Finishes the last unfinished job of the folder, only the batches that were not committed get rendered.
+        :param save_folder: of the job
+        :param workers: number of processes to render with
+        :param telemetry: gets the stage timings and the progress of the job
+        :return: number of exported variants, None if the folder has no unfinished job
+        """
+        manifest = ExportManifest(save_folder)
+        job = manifest.get_unfinished_job()
+        if job is None:
+            return None
+        if job["form_id"] != self.compiled_form.get_form_id() or job["params"] != self.get_params():
+            raise ValueError(f"Export job {job['job']} was started with another form or other parameters")
+        return self.run_job(save_folder, manifest, job, workers, telemetry)
+
+    def run_job(self, save_folder: str, manifest: ExportManifest, job: dict, workers: int = 1,
+                telemetry: ExportTelemetry | None = None) -> int:
+        committed = {batch["start"] for batch in manifest.get_committed(job["job"])}
+        chunks = [chunk for chunk in split_copies(job["copies"], SAMPLE_BATCH_SIZE) if chunk.start not in committed]
+        copies = sum(len(chunk) for chunk in chunks)
+        if telemetry is not None:
+            telemetry.start("png", job["seed"], copies, workers)
+        work = partial(self.export_range, save_folder, job["first"], seed=job["seed"])
+        for chunk, (files, timer) in zip(chunks, run_chunks(work, chunks, workers)):
+            manifest.commit_batch(job["job"], chunk.start, files)
+            if telemetry is not None:
+                telemetry.add(timer)
+        manifest.finish_job(job["job"])
+        if telemetry is not None:
+            telemetry.finish()
+        return copies
+
+    def export_shards(self, save_folder: str, copies: int, label: str, seed: int | None = None, workers: int = 1,
+                      shard_size: int = DEFAULT_SHARD_SIZE, telemetry: ExportTelemetry | None = None) -> int:
+        """
+        Exports the given amount of variants as shards into the dataset folder (see shards.py).
+        Every worker writes whole shards, the index is appended in order once a shard is done.
+        :param save_folder: of the sharded dataset
+        :param copies: amount of variants to export
+        :param label: stored with every sample
+        :param seed: of the job, a random one is used if none is given
+        :param workers: number of processes to render with
+        :param shard_size: number of samples per shard
+        :param telemetry: gets the stage timings and the progress of the job
+        :return: number of exported variants
+        """
+        os.makedirs(save_folder, exist_ok=True)
+        starts_with = get_next_key(save_folder)
+        if seed is None:
+            seed = create_seed()
+
+        if telemetry is not None:
+            telemetry.start("shards", seed, copies, workers)
+        chunks = split_copies(copies, shard_size)
+        work = partial(self.export_shard, save_folder, starts_with, seed=seed, label=label)
+        for entry, timer in run_chunks(work, chunks, workers):
+            append_index(save_folder, entry)
+            if telemetry is not None:
+                telemetry.add(timer)
+        if telemetry is not None:
+            telemetry.finish()
+        return copies
+
+    def get_sample_meta(self, seed: int, copy_index: int) -> dict:
+        return {"seed": seed, "form_id": self.compiled_form.get_form_id(), "variant": copy_index}
+
+    def render_variant(self, seed: int, copy_index: int) -> Tuple[Stats, np.ndarray]:
+        """
+        Renders a single copy of a job again.
+        :param seed: of the job
+        :param copy_index: index of the copy within the job
+        :return: stats and pixels of the copy
+        """
+        _, stats, pixels = next(self.render_range(range(copy_index, copy_index + 1), seed))
+        return stats, np.array(pixels)
+
+    def render_range(self, copy_indices: range, seed: int,
+                     timer: StageTimer | None = None) -> Iterator[Tuple[int, Stats, np.ndarray]]:
+        """
+        Renders the copies with the given indices one after another.
+        :param copy_indices: indices of the copies within the job
+        :param seed: of the job
+        :param timer: gets the sample, similarity and render times, the caller marks its own stages
+        :return: copy index, stats and pixels of the current copy, the pixels are only valid until the next one
+        """
+        if timer is None:
+            timer = StageTimer()
+        # Rendered in batches of SAMPLE_BATCH_SIZE, so the memory is the same for any shard or chunk size
+        for start in range(0, len(copy_indices), SAMPLE_BATCH_SIZE):
+            yield from self.render_batch(copy_indices[start:start + SAMPLE_BATCH_SIZE], seed, timer)
+
+    def render_batch(self, copy_indices: range, seed: int,
+                     timer: StageTimer) -> Iterator[Tuple[int, Stats, np.ndarray]]:
+        batch = self.compiled_form.sample_indexed(seed, copy_indices)
+        timer.mark("sample")
+        batch_stats = split_stats(calculate_stats(self.compiled_form.stats, self.compiled_form.get_deviation(batch)))
+        timer.mark("similarity")
+        if self.rasterizer == "numpy":
+            images = rasterize_form(self.compiled_form, batch, self.size, self.scale_factor, self.tolerance,
+                                    self.background[0])
+            if not self.grayscale:
+                images = np.broadcast_to(images[..., np.newaxis], images.shape + (3,))
+        else:
+            batch_curves = self.compiled_form.tessellate(batch, self.scale_factor, self.tolerance)
+            images = (self.render(positions, curves) for positions, curves in zip(batch, batch_curves))
+        # The images are rendered lazily, so the render time is marked when the next one is done
+        for copy_index, stats, pixels in zip(copy_indices, batch_stats, images):
+            timer.mark("render")
+            yield copy_index, stats, pixels
+
+    def export_range(self, save_folder: str, starts_with: int, copy_indices: range,
+                     seed: int) -> Tuple[List[dict], StageTimer]:
+        """
+        Exports the copies with the given indices. Used as unit of work for the worker processes.
+        :param save_folder: to write the png files to
+        :param starts_with: file number of the first copy of the job
+        :param copy_indices: indices of the copies within the job
+        :param seed: of the job
+        :return: sha256 and stats of every written file, stage times of the range
+        """
+        timer = StageTimer()
+        files = []
+        for copy_index, stats, pixels in self.render_range(copy_indices, seed, timer):
+            png = encode_png(pixels, stats, self.compress_level, self.get_sample_meta(seed, copy_index))
+            timer.mark("encode")
+            with open(os.path.join(save_folder, f"{starts_with + copy_index}.png"), "wb") as f:
+                f.write(png)
+            files.append({"sha256": hashlib.sha256(png).hexdigest(), "stats": stats.to_dict()})
+            timer.add_file(len(png))
+            timer.mark("write")
+        return files, timer
+
+    def export_shard(self, save_folder: str, starts_with: int, copy_indices: range, seed: int,
+                     label: str) -> Tuple[dict, StageTimer]:
+        """
+        Exports the copies with the given indices as one shard. Used as unit of work for the worker processes.
+        :param save_folder: of the sharded dataset
+        :param starts_with: key of the first copy of the job
+        :param copy_indices: indices of the copies within the job
+        :param seed: of the job
+        :param label: stored with every sample
+        :return: index entry of the written shard, stage times of the shard
+        """
+        timer = StageTimer()
+
+        def encode_samples():
+            for copy_index, stats, pixels in self.render_range(copy_indices, seed, timer):
+                png = encode_png(pixels, stats, self.compress_level, self.get_sample_meta(seed, copy_index))
+                timer.add_file(len(png))
+                timer.mark("encode")
+                yield png, dict(stats.to_dict(), label=label, **self.get_sample_meta(seed, copy_index))
+                # write_shard added the sample to the tar before asking for the next one
+                timer.mark("write")
+
+        entry = write_shard(save_folder, starts_with + copy_indices.start, encode_samples())
+        timer.mark("write")
+        return entry, timer
+
+
+def split_copies(copies: int, chunk_size: int) -> List[range]:
+    return [range(start, min(start + chunk_size, copies)) for start in range(0, copies, chunk_size)]
+
+
+def run_chunks(work: Callable[[range], any], chunks: List[range], workers: int) -> Iterator[any]:
+    """
+    Runs the work for all chunks either in this process or in a process pool.
+    :param work: picklable function that processes one chunk
+    :param chunks: to process
+    :param workers: number of processes
+    :return: results of the chunks in chunk order
+    """
+    if workers <= 1:
+        yield from map(work, chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(work, chunks)
@@ -1,46 +1,18 @@
-import copy
 import os
 
-import numpy as np
 import pygame
 import pygame_gui
-from PIL import Image
-from PIL.PngImagePlugin import PngInfo
-from pygame import Surface
 from pygame.event import Event
 from pygame.rect import Rect
 from pygame_gui import UI_BUTTON_PRESSED
 from pygame_gui.core import UIContainer
 from pygame_gui.elements import UIButton, UITextEntryLine
 
-from base_form import BaseForm, Stats
 from base_form_storage import BaseFormStorageView
 from base_form_view import BaseFormView
-from consts import REGENERATE
 from event_dispatcher import EventDispatcher
-from preview_view import PreviewView
-
-
-def get_latest_file(folder):
-    files = os.listdir(folder)
-    highest_number = 0
-    for file in files:
-        name, extension = os.path.splitext(file)
-        try:
-            number = int(name)
-            if number > highest_number:
-                highest_number = number
-        except ValueError:
-            pass
-    return highest_number
-
-
-def save_meta(file_path: str, stats: Stats):
-    img = Image.open(file_path)
-    info = PngInfo()
-    for key, value in vars(stats).items():
-        info.add_text(key, str(value))
-    img.save(file_path, "PNG", pnginfo=info)
+from exporter import Exporter
+from telemetry import ExportTelemetry, format_record
 
 
 class ExporterView(UIContainer):
@@ -50,10 +22,10 @@ class ExporterView(UIContainer):
         self.export_button = UIButton(Rect(10, 10, 160, 30), "Export", container=self)
         self.copies = UITextEntryLine(Rect(10, 40, 160, 30), initial_text="10", container=self)
         self.copies.set_allowed_characters(list("0123456798"))
+        # Empty for a random seed
+        self.seed = UITextEntryLine(Rect(10, 70, 160, 30), initial_text="", placeholder_text="seed", container=self)
+        self.seed.set_allowed_characters(list("0123456798"))
 
-        export_size = Rect(0, 0, 128, 128)
-        self.export_surface = Surface(export_size.size)
-        self.render: PreviewView = PreviewView(export_size, event_dispatcher, base_form_view)
         self.storage_view = storage_view
         self.base_form_view = base_form_view
 
@@ -64,36 +36,15 @@ class ExporterView(UIContainer):
             print("export started..")
             folder = self.storage_view.get_name()
             save_folder = os.path.join("data", folder)
-            if not os.path.exists(save_folder):
-                os.mkdir(save_folder)
-            starts_with = get_latest_file(save_folder)
-
             copies = int(self.copies.text)
+            seed = int(self.seed.text) if self.seed.text != "" else None
 
-            for copy_index in range(copies):
-                self.render.regenerate(Event(REGENERATE))
-                self.render.draw(self.export_surface)
-                stats = self.calculate_similarity(self.base_form_view.form, self.render.current_form)
-                file_path = os.path.join("data", folder, f"{starts_with + copy_index}.png")
-                pygame.image.save(self.export_surface, file_path)
-                save_meta(file_path, stats)
-            print(f"{copies} copies exported")
+            exporter = Exporter(self.base_form_view.get_current_form())
+            exporter.export(save_folder, copies, seed=seed,
+                            telemetry=ExportTelemetry(callback=lambda record: print(format_record(record))))
         except TypeError as e:
             print(e)
         except ValueError as e:
             print(e)
         print("..export done")
         return True
-
-    def calculate_similarity(self, original: BaseForm, variant: BaseForm) -> Stats:
-        original_points = original.to_numpy()
-        variant_points = variant.to_numpy()
-        deviation = np.mean(1 - cosine_similarity(original_points, variant_points))
-        stats = copy.deepcopy(original.stats)
-        stats.scale(deviation)
-        stats.aesthetic = deviation
-        return stats
-
-
-def cosine_similarity(a, b) -> float:
-    return np.dot(a, b.T) / (np.linalg.norm(a) * np.linalg.norm(b))
@@ -0,0 +1,90 @@
+"""
+Versioned base form file format.
+
+A form file is a numpy .npz archive that only holds plain arrays, no pickled objects:
+
+    header          JSON as uint8 bytes: format name, version, form point count and stats
+    positions       (P, 2) float64 editor positions of the points
+    base            (P, 2) float64 base positions
+    variance_min    (P, 2) float64 lower variance bounds
+    variance_max    (P, 2) float64 upper variance bounds
+    lines           (L, 2) point indices of the lines
+    handles         (L, 2, 2) float64 bezier handles
+    widths          (L,) int32 line widths
+    curves          (L,) bool curve flags
+    width_variance  (L, 2) float64 width variance bounds
+    body_parts      (L,) int32 bit mask of BodyPart values
+    body_features   (L,) int32 bit mask of BodyFeature values
+
+Files of older versions are migrated on load (see MIGRATIONS), so the code using the arrays only has to know
+the current version. Reading a form file only needs numpy, neither pygame nor the editor modules.
+"""
+import json
+from typing import Dict, NamedTuple, Callable, Tuple, BinaryIO
+
+import numpy as np
+
+FORMAT_NAME = "chalkling-form"
+FORMAT_VERSION = 1
+FORM_SUFFIX = ".npz"
+# Base forms stored with dill before the form files
+LEGACY_FORM_SUFFIX = ".pickle"
+HEADER = "header"
+FORM_ARRAYS = ("positions", "base", "variance_min", "variance_max", "lines", "handles", "widths", "curves",
+               "width_variance", "body_parts", "body_features")
+
+# version -> function that upgrades header and arrays of that version to the next one
+MIGRATIONS: Dict[int, Callable[[dict, Dict[str, np.ndarray]], Tuple[dict, Dict[str, np.ndarray]]]] = {}
+
+
+class FormFile(NamedTuple):
+    arrays: Dict[str, np.ndarray]
+    form_point_count: int
+    stats: Dict[str, float]
+
+
+def write_form_file(file: str | BinaryIO, arrays: Dict[str, np.ndarray], form_point_count: int,
+                    stats: Dict[str, float]):
+    """
+    Writes a form file of the current version.
+    :param file: path or binary file to write to
+    :param arrays: with all names of FORM_ARRAYS
+    :param form_point_count: number of points that belong to the form (the rest are only used by lines)
+    :param stats: of the form
+    """
+    header = {"format": FORMAT_NAME, "version": FORMAT_VERSION, "form_point_count": form_point_count,
+              "stats": stats}
+    header_bytes = np.frombuffer(json.dumps(header, sort_keys=True).encode("utf-8"), dtype=np.uint8)
+    payload = {name: arrays[name] for name in FORM_ARRAYS}
+    if isinstance(file, str):
+        with open(file, "wb") as f:
+            np.savez(f, **{HEADER: header_bytes}, **payload)
+    else:
+        np.savez(file, **{HEADER: header_bytes}, **payload)
+
+
+def read_form_file(file: str | BinaryIO) -> FormFile:
+    """
+    Reads a form file and migrates it to the current version.
+    :param file: path or binary file to read from
+    :return: arrays, form point count and stats of the form
+    """
+    with np.load(file, allow_pickle=False) as archive:
+        if HEADER not in archive.files:
+            raise ValueError("Not a form file, the header is missing")
+        header = json.loads(archive[HEADER].tobytes().decode("utf-8"))
+        arrays = {name: archive[name] for name in archive.files if name != HEADER}
+
+    if header.get("format") != FORMAT_NAME:
+        raise ValueError(f"Not a form file, unknown format {header.get('format')}")
+    if "version" not in header:
+        raise ValueError("Not a form file, the version is missing")
+    if header["version"] > FORMAT_VERSION:
+        raise ValueError(f"Form file version {header['version']} is newer than the supported {FORMAT_VERSION}")
+    while header["version"] < FORMAT_VERSION:
+        header, arrays = MIGRATIONS[header["version"]](header, arrays)
+
+    missing = [name for name in FORM_ARRAYS if name not in arrays]
+    if len(missing) > 0:
+        raise ValueError(f"Form file misses the arrays {', '.join(missing)}")
+    return FormFile(arrays, int(header["form_point_count"]), header["stats"])
@@ -1,6 +1,7 @@
 import math
 from typing import Tuple, List, Iterable
 
+import numpy as np
 import pygame
 import pygame_gui
 from pygame import Surface, Rect, KEYUP
@@ -11,15 +12,17 @@ from pygame_gui.core import UIContainer
 from pygame_gui.elements import UITextEntryLine, UILabel, UITextBox
 
 from UICheckbox import get_checked_values, UICheckbox
-from bezier import bezier_curve
+from bezier import adaptive_bezier_curves, BEZIER_TOLERANCE
 from consts import WHITE, YELLOW, BodyPart, BodyFeature, SELECT_ELEMENT, CHECKBOX_CHANGED, NUM_CHARACTERS
 from dnd_handler import DragAble
 from event_dispatcher import EventDispatcher, on_change_checked_list, on_change_checked, on_change_float
 from point import Point, PointSetting
 from selection_handler import Selectable, Marks
+from slotted import Slotted
 
 
 class Line(Selectable, DragAble):
+    __slots__ = ("point_a", "point_b", "point_a_bezier", "point_b_bezier", "width", "settings")
 
     def __init__(self, point_a: Point, point_b: Point, settings: "LineSetting"):
         super().__init__()
@@ -36,10 +39,10 @@ class Line(Selectable, DragAble):
         self.width = 4
         self.settings: LineSetting = settings
 
-    def draw(self, screen: Surface):
+    def draw(self, screen: Surface, curve: np.ndarray | None = None):
         color = self.get_color()
         if self.settings.curve:
-            self.draw_bezier(screen, color)
+            self.draw_bezier(screen, color, curve)
         else:
             pygame.draw.line(screen, color, self.point_a.get_pos(), self.point_b.get_pos(), int(self.width))
         if self.settings.curve and \
@@ -54,10 +57,10 @@ class Line(Selectable, DragAble):
             self.point_a_bezier.selectable = False
             self.point_b_bezier.selectable = False
 
-    def render(self, screen: Surface):
+    def render(self, screen: Surface, curve: np.ndarray | None = None):
         color = WHITE
         if self.settings.curve:
-            self.draw_bezier(screen, color)
+            self.draw_bezier(screen, color, curve)
         else:
             pygame.draw.line(screen, color, self.point_a.get_pos(), self.point_b.get_pos(), int(self.width))
 
@@ -106,19 +109,34 @@ class Line(Selectable, DragAble):
                 prev_point = curve_point
             return False
 
-    def draw_bezier(self, surface: Surface, color: any):
-        curve = self.get_bezier()
+    def get_bounds(self) -> Rect:
+        # The curve always stays inside the box of its control points, so the box fits curved and straight lines
+        xs, ys = zip(*self.get_control_points())
+        left, top = math.floor(min(xs)) - 1, math.floor(min(ys)) - 1
+        return Rect(left, top, math.ceil(max(xs)) + 1 - left, math.ceil(max(ys)) + 1 - top)
+
+    def draw_bezier(self, surface: Surface, color: any, curve: np.ndarray | None = None):
+        """
+        Draws the bezier curve of this line.
+        :param surface: to draw to
+        :param color: of the curve
+        :param curve: already evaluated curve points, will be calculated when not given
+        """
+        curve = self.get_bezier() if curve is None else curve.tolist()
         prev_point = None
         for curve_point in curve:
             if prev_point is not None:
                 pygame.draw.line(surface, color, prev_point, curve_point, self.width)
             prev_point = curve_point
 
-    def get_bezier(self) -> List[Tuple[float, float]]:
-        return bezier_curve([self.point_a.get_pos(),
-                             self.point_a_bezier.get_pos(),
-                             self.point_b_bezier.get_pos(),
-                             self.point_b.get_pos()])
+    def get_bezier(self, tolerance: float = BEZIER_TOLERANCE) -> List[Tuple[float, float]]:
+        return adaptive_bezier_curves(np.array([self.get_control_points()]), tolerance)[0].tolist()
+
+    def get_control_points(self) -> List[Tuple[float, float]]:
+        return [self.point_a.get_pos(),
+                self.point_a_bezier.get_pos(),
+                self.point_b_bezier.get_pos(),
+                self.point_b.get_pos()]
 
     def distance(self, p: Point | Tuple[float, float]) -> float:
         if self.point_a is None or self.point_b is None:
@@ -152,7 +170,9 @@ class Line(Selectable, DragAble):
         self.point_b_bezier.scale(factor)
 
 
-class LineSetting:
+class LineSetting(Slotted):
+    __slots__ = ("width_variance_min", "width_variance_max", "body_parts", "body_features", "curve")
+
     def __init__(self):
         self.width_variance_min: float = 1.0
         self.width_variance_max: float = 5.0
@@ -0,0 +1,185 @@
+"""
+PyTorch datasets for exported chalklings. Every sample is a dict like the notebook loader produces:
+{"label": class index, "image": (1, H, W) float tensor normalized to [-1, 1], "data": stats tensor}
+"""
+import itertools
+import math
+import os
+from typing import List, Iterator, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset, IterableDataset, get_worker_info
+
+from array_dataset import STAT_KEYS, decode_png, open_arrays, read_label_names
+from bezier import BEZIER_TOLERANCE
+from compiled_form import load_compiled_form
+from exporter import Exporter, EXPORT_SIZE, create_seed
+from shards import ShardReader
+
+
+def image_to_tensor(image: np.ndarray) -> torch.Tensor:
+    """
+    Converts (..., H, W) uint8 grayscale images into normalized (..., 1, H, W) float tensors.
+    """
+    # Converting the dtype copies, so read only arrays (memory maps, decoded pngs) are fine
+    tensor = torch.tensor(image, dtype=torch.float32).unsqueeze(-3)
+    return tensor.div_(127.5).sub_(1.0)
+
+
+class ShardDataset(IterableDataset):
+    """
+    Streams the samples of a sharded dataset folder. The shards are split between the DataLoader workers,
+    each shard is read sequentially.
+    """
+
+    def __init__(self, folder: str, labels: List[str] | None = None, verify: bool = True):
+        super().__init__()
+        self.reader = ShardReader(folder, verify)
+        self.labels: List[str] = labels if labels is not None else self.reader.get_labels()
+
+    def __len__(self):
+        return len(self.reader)
+
+    def __iter__(self) -> Iterator[dict]:
+        worker = get_worker_info()
+        shards = self.reader.shards
+        if worker is not None:
+            shards = shards[worker.id::worker.num_workers]
+        for entry in shards:
+            for key, png, meta in self.reader.read_shard(entry):
+                yield {
+                    "label": torch.tensor(self.labels.index(meta["label"])),
+                    "image": image_to_tensor(decode_png(png)[0]),
+                    "data": torch.tensor([float(meta[stat]) for stat in STAT_KEYS])
+                }
+
+
+class MemmapDataset(Dataset):
+    """
+    Reads a packed array dataset (see array_dataset.py) through memory maps. Nothing is loaded up front,
+    images get converted when they are fetched. Every DataLoader worker opens its own read only maps,
+    the pages themselves are shared through the page cache.
+    """
+
+    def __init__(self, folder: str):
+        super().__init__()
+        self.folder = folder
+        self.labels: List[str] = read_label_names(folder)
+        self.length = len(open_arrays(folder)[2])
+        self.arrays = None
+
+    def __len__(self):
+        return self.length
+
+    def __getstate__(self):
+        # Workers open their own maps
+        state = vars(self).copy()
+        state["arrays"] = None
+        return state
+
+    def get_arrays(self):
+        if self.arrays is None:
+            self.arrays = open_arrays(self.folder)
+        return self.arrays
+
+    def __getitem__(self, index) -> dict:
+        images, stats, labels = self.get_arrays()
+        return {
+            "label": torch.tensor(labels[index]),
+            "image": image_to_tensor(images[index]),
+            "data": torch.tensor(stats[index])
+        }
+
+    def __getitems__(self, indices: List[int]) -> List[dict]:
+        # Batched fetch (used by the DataLoader when available): one read and conversion for the whole batch
+        images, stats, labels = self.get_arrays()
+        order = np.argsort(indices)
+        sorted_indices = np.asarray(indices)[order]
+        batch_images = image_to_tensor(images[sorted_indices])
+        batch_stats = torch.tensor(stats[sorted_indices])
+        batch_labels = torch.tensor(labels[sorted_indices])
+        items = [None] * len(indices)
+        for position, i in enumerate(order):
+            items[i] = {"label": batch_labels[position], "image": batch_images[position], "data": batch_stats[position]}
+        return items
+
+
+class GenerationDataset(IterableDataset):
+    """
+    Generates and renders fresh variants of base forms inside the DataLoader workers, nothing touches the disk.
+
+    Variant i of a form is always sampled from the same random stream (seed, epoch, form, i), the variants are
+    split in blocks between the workers. With variants_per_form set, every epoch has a fixed size and is
+    reproducible, otherwise the stream is infinite. Use set_epoch to get new variants for the next epoch.
+    """
+
+    def __init__(self, form_files: List[str], seed: int | None = None, variants_per_form: int | None = None,
+                 size: Tuple[int, int] = EXPORT_SIZE, tolerance: float = BEZIER_TOLERANCE, block_size: int = 64,
+                 rasterizer: str = "pygame"):
+        super().__init__()
+        self.form_files = form_files
+        self.labels: List[str] = [os.path.basename(file).split(".")[0] for file in form_files]
+        self.seed = seed if seed is not None else create_seed()
+        self.variants_per_form = variants_per_form
+        self.size = size
+        self.tolerance = tolerance
+        self.block_size = block_size
+        self.rasterizer = rasterizer
+        self.epoch = 0
+        self.exporters: List[Exporter] | None = None
+
+    def __len__(self):
+        if self.variants_per_form is None:
+            raise TypeError("An infinite generation dataset has no length")
+        return self.variants_per_form * len(self.form_files)
+
+    def __getstate__(self):
+        # Workers load the forms themselves
+        state = vars(self).copy()
+        state["exporters"] = None
+        return state
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def get_exporters(self) -> List[Exporter]:
+        if self.exporters is None:
+            self.exporters = [Exporter(load_compiled_form(file), self.size, tolerance=self.tolerance, grayscale=True,
+                                       rasterizer=self.rasterizer) for file in self.form_files]
+        return self.exporters
+
+    def get_form_seed(self, form_index: int) -> int:
+        return int(np.random.SeedSequence([self.seed, self.epoch, form_index]).generate_state(1, np.uint64)[0])
+
+    def __iter__(self) -> Iterator[dict]:
+        worker = get_worker_info()
+        worker_id, workers = (worker.id, worker.num_workers) if worker is not None else (0, 1)
+        exporters = self.get_exporters()
+        seeds = [self.get_form_seed(form_index) for form_index in range(len(exporters))]
+
+        if self.variants_per_form is None:
+            blocks = itertools.count(worker_id, workers)
+        else:
+            blocks = range(worker_id, math.ceil(self.variants_per_form / self.block_size), workers)
+        for block in blocks:
+            stop = (block + 1) * self.block_size
+            if self.variants_per_form is not None:
+                stop = min(stop, self.variants_per_form)
+            indices = range(block * self.block_size, stop)
+            rendered = [self.render_block(exporter, indices, seed, label)
+                        for label, (exporter, seed) in enumerate(zip(exporters, seeds))]
+            # Interleave the forms so batches contain all labels
+            for samples in zip(*rendered):
+                yield from samples
+
+    @staticmethod
+    def render_block(exporter: Exporter, indices: range, seed: int, label: int) -> List[dict]:
+        samples = []
+        for copy_index, stats, pixels in exporter.render_range(indices, seed):
+            samples.append({
+                "label": torch.tensor(label),
+                "image": image_to_tensor(pixels),
+                "data": torch.tensor([getattr(stats, key) for key in STAT_KEYS], dtype=torch.float32)
+            })
+        return samples
@@ -0,0 +1,104 @@
+"""
+Append only manifest of a png export folder.
+
+    <folder>/manifest.jsonl     one record per line:
+
+    {"type": "job", "job": 0, "seed": .., "form_id": .., "copies": .., "first": .., "params": {..}}
+    {"type": "batch", "job": 0, "start": .., "count": .., "sha256": [..], "stats": {"attack": [..], ..}}
+    {"type": "done", "job": 0}
+
+A job reserves the file numbers first .. first + copies - 1, a batch record is only appended once all of its
+files are written. A killed job is resumed by rendering the batches that have no record yet, new jobs continue
+after the last reserved file number, so the folder never has to be listed.
+"""
+import json
+import os
+from typing import List, Dict, Iterator
+
+MANIFEST_FILE = "manifest.jsonl"
+# Batch records make up most of the manifest, they are only parsed when a job gets resumed
+BATCH_PREFIX = '{"type": "batch"'
+
+
+class ExportManifest:
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_FILE)
+        # job id -> job record, done flags of the jobs
+        self.jobs: Dict[int, dict] = {}
+        self.done: Dict[int, bool] = {}
+        for record in self.read(batches=False):
+            if record["type"] == "job":
+                self.jobs[record["job"]] = record
+                self.done[record["job"]] = False
+            elif record["type"] == "done":
+                self.done[record["job"]] = True
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def read(self, batches: bool = True) -> Iterator[dict]:
+        if not self.exists():
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                if line.strip() == "" or (not batches and line.startswith(BATCH_PREFIX)):
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line of a killed job might be incomplete, it was never committed
+                    pass
+
+    def append(self, record: dict):
+        with open(self.path, "ab+") as f:
+            # Terminate the incomplete last line of a killed job, so the record starts on its own line
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write((json.dumps(record) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def get_next_index(self) -> int:
+        return max((job["first"] + job["copies"] for job in self.jobs.values()), default=0)
+
+    def get_unfinished_job(self) -> dict | None:
+        unfinished = [job_id for job_id, done in self.done.items() if not done]
+        return self.jobs[unfinished[-1]] if len(unfinished) > 0 else None
+
+    def get_committed(self, job_id: int) -> List[dict]:
+        return [record for record in self.read() if record["type"] == "batch" and record["job"] == job_id]
+
+    def start_job(self, seed: int, form_id: int, copies: int, first: int, params: dict) -> dict:
+        """
+        Reserves the file numbers of a new job.
+        :param seed: of the job
+        :param form_id: of the exported form
+        :param copies: number of variants
+        :param first: file number of the first variant
+        :param params: render parameters of the exporter
+        :return: job record
+        """
+        job = {"type": "job", "job": len(self.jobs), "seed": seed, "form_id": form_id, "copies": copies,
+               "first": first, "params": params}
+        self.append(job)
+        self.jobs[job["job"]] = job
+        self.done[job["job"]] = False
+        return job
+
+    def commit_batch(self, job_id: int, start: int, files: List[dict]):
+        """
+        Records a batch whose files are completely written.
+        :param job_id: the batch belongs to
+        :param start: variant index of the first file
+        :param files: sha256 and stats of every file
+        """
+        stats = {key: [file["stats"][key] for file in files] for key in (files[0]["stats"] if files else ())}
+        self.append({"type": "batch", "job": job_id, "start": start, "count": len(files),
+                     "sha256": [file["sha256"] for file in files], "stats": stats})
+
+    def finish_job(self, job_id: int):
+        self.append({"type": "done", "job": job_id})
+        self.done[job_id] = True
@@ -14,9 +14,11 @@ from consts import WHITE, YELLOW, POINT_SIZE, GREEN, GREY, NUM_CHARACTERS, SELEC
 from dnd_handler import DragAble
 from event_dispatcher import EventDispatcher, on_change_float
 from selection_handler import Selectable, Marks
+from slotted import Slotted
 
 
 class Point(Selectable, DragAble):
+    __slots__ = ("settings", "pos", "selectable")
 
     def __init__(self, pos: Vector2, settings: "PointSetting"):
         super().__init__()
@@ -58,6 +60,9 @@ class Point(Selectable, DragAble):
     def get_pos(self) -> Tuple[float, float]:
         return self.pos.xy[0], self.pos.xy[1]
 
+    def get_bounds(self) -> Rect:
+        return Rect(self.pos[0] - POINT_SIZE, self.pos[1] - POINT_SIZE, 2 * POINT_SIZE, 2 * POINT_SIZE)
+
     def set_pos(self, pos: Tuple[float, float] | Vector2):
         self.pos.update(pos)
         self.settings.set_base(self.get_pos())
@@ -78,7 +83,9 @@ class Point(Selectable, DragAble):
         self.settings.set_bounds(bounds)
 
 
-class PointSetting:
+class PointSetting(Slotted):
+    __slots__ = ("base_x", "base_y", "pos_variance_x_min", "pos_variance_x_max", "pos_variance_y_min",
+                 "pos_variance_y_max")
 
     def __init__(self,
                  pos_variance_x_min: float = -10,
@@ -1,4 +1,3 @@
-import copy
 from types import NoneType
 from typing import List, Tuple
 
@@ -7,43 +6,54 @@ from pygame import Rect, Surface, KEYUP
 from pygame.event import Event
 from pygame_gui import UI_TEXT_ENTRY_CHANGED
 
-from base_form import BaseForm
 from base_form_view import BaseFormView
-from consts import REGENERATE, CHECKBOX_CHANGED, EDIT_FORM
+from compiled_form import FormVariant
+from consts import REGENERATE, CHECKBOX_CHANGED, EDIT_FORM, PREVIEW_DEBOUNCE
 from event_dispatcher import EventDispatcher
+from exporter import create_seed
 
 
 class PreviewView:
-    def __init__(self, rect: Rect, event_dispatcher: EventDispatcher, base_form_view: BaseFormView):
+    def __init__(self, rect: Rect, event_dispatcher: EventDispatcher, base_form_view: BaseFormView, seed: int,
+                 variant_index: int = 0):
         self.surface: Surface = Surface(rect.size)
         self.event_dispatcher = event_dispatcher
         self.base_form_view = base_form_view
-        self.current_form: BaseForm | None = None
+        self.current_variant: FormVariant | None = None
+        # The previews show the variants with their index of the seed, edits keep the seed
+        self.seed = seed
+        self.variant_index = variant_index
         self.rect = rect
         self.scale_factor = rect.width / base_form_view.form_surface.get_rect().width
         self.background = (5, 5, 5)
+        self.dirty: bool = True
 
-        event_dispatcher.listen(self.regenerate, event_type=REGENERATE)
-        event_dispatcher.listen(self.regenerate, event_type=UI_TEXT_ENTRY_CHANGED)
-        event_dispatcher.listen(self.regenerate, event_type=CHECKBOX_CHANGED)
-        event_dispatcher.listen(self.regenerate, event_type=EDIT_FORM)
+        event_dispatcher.listen_coalesced(self.regenerate, [REGENERATE, UI_TEXT_ENTRY_CHANGED, CHECKBOX_CHANGED,
+                                                            EDIT_FORM], PREVIEW_DEBOUNCE)
         event_dispatcher.listen(self.on_key_up, event_type=KEYUP)
 
     def regenerate(self, event: Event) -> bool:
-        self.current_form = copy.deepcopy(self.base_form_view.get_current_form())
-        self.current_form.regenerate()
-        self.current_form.scale(self.scale_factor)
+        # The seed of a REGENERATE event survives edits that were coalesced with it
+        if hasattr(event, "seed"):
+            self.seed = event.seed
+        # Edits invalidate the form view before the coalesced events arrive, so all previews share one compile
+        compiled_form = self.base_form_view.get_compiled_form()
+        self.current_variant = compiled_form.create_variant(self.seed, self.variant_index)
+        self.dirty = True
         return False
 
     def draw(self, screen: Surface):
         self.surface.fill(self.background)
-        if self.current_form is not None:
-            self.current_form.render(self.surface)
+        if self.current_variant is not None:
+            self.current_variant.render(self.surface, self.scale_factor)
         screen.blit(self.surface, self.rect.topleft)
+        self.dirty = False
 
     def on_key_up(self, event: Event) -> bool:
         match event.key:
             case pygame.K_r:
-                pygame.event.post(Event(REGENERATE))
+                seed = create_seed()
+                print(f"preview seed: {seed}")
+                pygame.event.post(Event(REGENERATE, seed=seed))
                 return True
         return False
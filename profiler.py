@@ -0,0 +1,114 @@
+"""
+Opt-in frame profiler of the editor.
+
+The runner marks the end of every phase of a frame (events, drawing, ui update, display update), the event
+dispatcher adds the time of every listener. The rolling averages are shown by the ProfilerOverlay and every
+frame can be appended as one JSON line to a trace file:
+
+    {"frame": 12, "total": 0.0041, "phases": {"events": 0.0002, ..}, "listeners": {"PreviewView.regenerate": ..}}
+
+Nothing gets timed while no profiler is set, the runner and the dispatcher only check for None.
+"""
+import json
+import time
+from collections import deque
+from typing import Dict, Deque, TextIO, List, Tuple
+
+import pygame
+from pygame import Rect, Surface
+
+PROFILER_HISTORY = 120
+OVERLAY_RECT = Rect(4, 4, 280, 180)
+OVERLAY_BACKGROUND = (20, 20, 20)
+OVERLAY_COLOR = (0, 255, 0)
+
+
+def get_listener_name(listener) -> str:
+    return getattr(listener, "__qualname__", type(listener).__name__)
+
+
+class FrameProfiler:
+    def __init__(self, history: int = PROFILER_HISTORY, trace_file: str | None = None):
+        self.frames: Deque[Tuple[float, Dict[str, float], Dict[str, float]]] = deque(maxlen=history)
+        self.frame_count = 0
+        self.trace: TextIO | None = open(trace_file, "a") if trace_file is not None else None
+        self._frame_start = 0.0
+        self._last_mark = 0.0
+        self._phases: Dict[str, float] = {}
+        self._listeners: Dict[str, float] = {}
+
+    def start_frame(self):
+        self._frame_start = self._last_mark = time.perf_counter()
+        self._phases = {}
+        self._listeners = {}
+
+    def mark(self, phase: str):
+        """
+        Ends a phase of the frame, the phase gets the time since the previous mark.
+        :param phase: name of the phase
+        """
+        now = time.perf_counter()
+        self._phases[phase] = self._phases.get(phase, 0.0) + now - self._last_mark
+        self._last_mark = now
+
+    def add_listener(self, name: str, seconds: float):
+        self._listeners[name] = self._listeners.get(name, 0.0) + seconds
+
+    def end_frame(self):
+        total = time.perf_counter() - self._frame_start
+        self.frames.append((total, self._phases, self._listeners))
+        if self.trace is not None:
+            self.trace.write(json.dumps({"frame": self.frame_count, "total": total, "phases": self._phases,
+                                         "listeners": self._listeners}) + "\n")
+        self.frame_count += 1
+
+    def get_averages(self) -> Tuple[float, Dict[str, float], Dict[str, float]]:
+        """
+        Averages over the frames of the history.
+        :return: seconds per frame in total, per phase and per listener
+        """
+        count = max(len(self.frames), 1)
+        total = sum(frame[0] for frame in self.frames) / count
+        phases: Dict[str, float] = {}
+        listeners: Dict[str, float] = {}
+        for _, frame_phases, frame_listeners in self.frames:
+            for name, seconds in frame_phases.items():
+                phases[name] = phases.get(name, 0.0) + seconds / count
+            for name, seconds in frame_listeners.items():
+                listeners[name] = listeners.get(name, 0.0) + seconds / count
+        return total, phases, listeners
+
+    def close(self):
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+
+class ProfilerOverlay:
+    """
+    Rolling frame time breakdown in the top left corner of the window.
+    """
+
+    def __init__(self, profiler: FrameProfiler, rect: Rect = OVERLAY_RECT):
+        self.profiler = profiler
+        self.rect = rect
+        self.surface = Surface(rect.size)
+        self.font = pygame.font.Font(None, 18)
+
+    def get_lines(self) -> List[str]:
+        total, phases, listeners = self.profiler.get_averages()
+        lines = [f"frame {total * 1000:6.2f} ms"]
+        lines += [f"  {name:<16} {seconds * 1000:6.2f} ms"
+                  for name, seconds in sorted(phases.items(), key=lambda item: -item[1])]
+        lines += [f"  {name[:28]:<28} {seconds * 1000:6.2f} ms"
+                  for name, seconds in sorted(listeners.items(), key=lambda item: -item[1])[:3]]
+        return lines
+
+    def draw(self, screen: Surface) -> Rect:
+        self.surface.fill(OVERLAY_BACKGROUND)
+        y = 4
+        for line in self.get_lines():
+            self.surface.blit(self.font.render(line, True, OVERLAY_COLOR), (4, y))
+            y += 14
+        screen.blit(self.surface, self.rect.topleft)
+        return self.rect
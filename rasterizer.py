@@ -0,0 +1,75 @@
+"""
+Pure NumPy rasterizer for white on black strokes. Draws thick, antialiased line segments for a whole batch of
+variants at once, the result can be used directly as image array or training tensor.
+"""
+from typing import Tuple
+
+import numpy as np
+
+from bezier import BEZIER_TOLERANCE
+from compiled_form import CompiledForm
+
+
+def rasterize_segments(segments: np.ndarray, widths: np.ndarray, size: Tuple[int, int],
+                       background: int = 0, foreground: int = 255) -> np.ndarray:
+    """
+    Rasterizes line segments into grayscale images.
+
+    The coverage of a pixel is derived from the distance of its center to the segment, so strokes get a one
+    pixel wide antialiased border. Segments are processed one after another, each of them for the whole batch
+    but only inside the bounding box it covers in the batch.
+    :param segments: (N, S, 2, 2) start and end point of every segment in pixels
+    :param widths: (S,) stroke width of every segment in pixels
+    :param size: width and height of the images
+    :param background: gray value of the background
+    :param foreground: gray value of the strokes
+    :return: (N, H, W) uint8 images
+    """
+    image_width, image_height = size
+    segments = np.asarray(segments, dtype=np.float32)
+    coverage = np.zeros((len(segments), image_height, image_width), dtype=np.float32)
+    pixel_x = np.arange(image_width, dtype=np.float32) + 0.5
+    pixel_y = np.arange(image_height, dtype=np.float32) + 0.5
+
+    for segment_index in range(segments.shape[1]):
+        start = segments[:, segment_index, 0]
+        end = segments[:, segment_index, 1]
+        radius = widths[segment_index] / 2 + 0.5
+
+        # Bounding box of the segment over the whole batch
+        x0 = max(int(np.floor(min(start[:, 0].min(), end[:, 0].min()) - radius)), 0)
+        x1 = min(int(np.ceil(max(start[:, 0].max(), end[:, 0].max()) + radius)), image_width)
+        y0 = max(int(np.floor(min(start[:, 1].min(), end[:, 1].min()) - radius)), 0)
+        y1 = min(int(np.ceil(max(start[:, 1].max(), end[:, 1].max()) + radius)), image_height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+
+        direction = end - start
+        length_squared = np.maximum((direction ** 2).sum(axis=-1), 1e-12)[:, np.newaxis, np.newaxis]
+        dx = pixel_x[np.newaxis, np.newaxis, x0:x1] - start[:, 0, np.newaxis, np.newaxis]
+        dy = pixel_y[np.newaxis, y0:y1, np.newaxis] - start[:, 1, np.newaxis, np.newaxis]
+        direction_x = direction[:, 0, np.newaxis, np.newaxis]
+        direction_y = direction[:, 1, np.newaxis, np.newaxis]
+        t = np.clip((dx * direction_x + dy * direction_y) / length_squared, 0, 1)
+        distance = np.hypot(dx - t * direction_x, dy - t * direction_y)
+        window = coverage[:, y0:y1, x0:x1]
+        np.maximum(window, np.clip(radius - distance, 0, 1), out=window)
+
+    images = background + coverage * (foreground - background)
+    return np.rint(images).astype(np.uint8)
+
+
+def rasterize_form(compiled_form: CompiledForm, positions: np.ndarray, size: Tuple[int, int],
+                   scale_factor: float = 1.0, tolerance: float = BEZIER_TOLERANCE, background: int = 0) -> np.ndarray:
+    """
+    Rasterizes a batch of variants of a form.
+    :param compiled_form: the variants belong to
+    :param positions: (N, P, 2) sampled positions
+    :param size: width and height of the images
+    :param scale_factor: from form to image space
+    :param tolerance: max distance in image pixels between the tessellated and the real curves
+    :param background: gray value of the background
+    :return: (N, H, W) uint8 images
+    """
+    segments, widths = compiled_form.get_segments(positions, scale_factor, tolerance)
+    return rasterize_segments(segments, widths, size, background)
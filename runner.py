@@ -1,20 +1,26 @@
+import argparse
+from typing import List, Dict, Tuple
+
 import pygame
 import pygame_gui
+from pygame import Surface
 from pygame.rect import Rect
 
 from base_form_storage import BaseFormStorageView
 from base_form_view import BaseFormView
 from consts import WINDOW_WIDTH, WINDOW_HEIGHT, TOP_RIGHT, BOTTOM_RIGHT, TOP_LEFT
 from event_dispatcher import EventDispatcher
+from exporter import create_seed
 from exporter_view import ExporterView
 from line import LineSettingView
 from point import PointSettingView
 from preview_view import PreviewView
+from profiler import FrameProfiler, ProfilerOverlay
 from stat_view import StatView
 
 
 class Runner:
-    def __init__(self):
+    def __init__(self, profile: bool = False, trace_file: str | None = None):
         pygame.init()
         pygame.display.set_caption("Chalkling-o-mat")
         self.window_surface = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
@@ -24,6 +30,8 @@ class Runner:
         self.clock = pygame.time.Clock()
         self.background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
         self.background.fill((0, 0, 0))
+        # Image, window area and if it was drawn of every ui sprite in the last frame
+        self.ui_state: Dict[object, Tuple[Surface | None, Rect, bool]] = {}
 
         self.event_dispatcher = EventDispatcher()
         self.point_setting_view = PointSettingView(self.event_dispatcher, Rect(-350, 10, 350, 340), TOP_RIGHT)
@@ -36,39 +44,135 @@ class Runner:
                                           self.base_form_view, self.storage_view)
         self.drawables = [self.base_form_view]
 
+        preview_seed = create_seed()
         preview_width = 128
         preview_height = 128
         for i in range(4):
             x = i % 2 * preview_width
             y = int(i / 2) * preview_height
             view_rect = Rect(220 + x, 522 + y, preview_width, preview_height)
-            preview_view = PreviewView(view_rect, self.event_dispatcher, self.base_form_view)
+            preview_view = PreviewView(view_rect, self.event_dispatcher, self.base_form_view, preview_seed, i)
             self.drawables.append(preview_view)
 
+        # Frame profiler, toggled with F3 (see profiler.py)
+        self.profiler: FrameProfiler | None = None
+        self.profiler_overlay: ProfilerOverlay | None = None
+        self.trace_file = trace_file
+        if profile:
+            self.toggle_profiler()
+
     def run(self):
         while self.is_running:
             time_delta = self.clock.tick(60) / 1000.0
+            if self.profiler is not None:
+                self.run_profiled_frame(time_delta)
+                continue
             self.handle_events()
-            self.draw()
+            dirty_rects = self.draw()
             self.ui_manager.update(time_delta)
-            pygame.display.update()
+            # Nothing changed, the window stays as it is
+            if len(dirty_rects) > 0:
+                pygame.display.update(dirty_rects)
+        if self.profiler is not None:
+            self.profiler.close()
+
+    def run_profiled_frame(self, time_delta: float):
+        profiler = self.profiler
+        profiler.start_frame()
+        self.handle_events()
+        dirty_rects = self.draw()
+        self.ui_manager.update(time_delta)
+        profiler.mark("ui update")
+        if self.profiler_overlay is not None:
+            dirty_rects.append(self.profiler_overlay.draw(self.window_surface))
+            profiler.mark("overlay")
+        pygame.display.update(dirty_rects)
+        profiler.mark("display update")
+        profiler.end_frame()
+
+    def toggle_profiler(self):
+        if self.profiler is None:
+            self.profiler = FrameProfiler(trace_file=self.trace_file)
+            self.profiler_overlay = ProfilerOverlay(self.profiler)
+        else:
+            self.profiler.close()
+            self.profiler = None
+            self.profiler_overlay = None
+            # Uncover the area of the overlay
+            self.base_form_view.invalidate()
+        self.event_dispatcher.profiler = self.profiler
 
-    def draw(self):
+    def draw(self) -> List[Rect]:
+        """
+        Redraws the drawables that are dirty and the ui on top.
+        :return: areas of the window that changed
+        """
+        dirty_rects = []
         for drawable in self.drawables:
-            drawable.draw(self.background)
-        self.window_surface.blit(self.background, (0, 0))
-        self.ui_manager.draw_ui(self.window_surface)
+            if drawable.dirty:
+                drawable.draw(self.background)
+                dirty_rects.append(drawable.rect)
+                if self.profiler is not None:
+                    self.profiler.mark(f"draw {type(drawable).__name__}")
+
+        dirty_rects.extend(self.get_ui_changes())
+
+        if len(dirty_rects) > 0:
+            # pygame_gui does not clear behind its elements, so the area gets the background and the ui again
+            area = dirty_rects[0].unionall(dirty_rects[1:])
+            self.window_surface.set_clip(area)
+            self.window_surface.blit(self.background, area, area)
+            self.ui_manager.draw_ui(self.window_surface)
+            self.window_surface.set_clip(None)
+        if self.profiler is not None:
+            self.profiler.mark("draw ui")
+        return dirty_rects
+
+    def get_ui_changes(self) -> List[Rect]:
+        """
+        pygame_gui has no dirty flags, but its elements get a new image whenever they change (hover, typing, the
+        blinking cursor..), so the ui sprites are compared with the last frame. The visible list and the blit data of
+        the sprite group are internals of pygame_gui 0.6, which is pinned in requirements.txt for that reason.
+        :return: old and new areas of the sprites that changed, moved, appeared or disappeared
+        """
+        group = self.ui_manager.get_sprite_group()
+        # Sprites only get drawn once the group has updated its list of visible sprites
+        drawn = {id(blit_data) for blit_data in group.visible}
+        ui_state = {sprite: (sprite.image, Rect(sprite.rect), id(sprite.blit_data) in drawn)
+                    for sprite in group.sprites()}
+        changed_rects = []
+        for sprite, (image, rect, visible) in ui_state.items():
+            last_state = self.ui_state.pop(sprite, None)
+            if last_state is None:
+                changed_rects.append(rect)
+            elif last_state[0] is not image or last_state[1] != rect or last_state[2] != visible:
+                changed_rects.extend((last_state[1], rect))
+        # Sprites that were removed leave their area behind
+        changed_rects.extend(rect for _, rect, _ in self.ui_state.values())
+        self.ui_state = ui_state
+        return changed_rects
 
     def handle_events(self):
         events = pygame.event.get()
         for event in events:
             if event.type == pygame.QUIT:
                 self.is_running = False
+            if event.type == pygame.KEYUP and event.key == pygame.K_F3:
+                self.toggle_profiler()
             self.event_dispatcher.process_event(event)
             self.ui_manager.process_events(event)
+        if self.profiler is not None:
+            self.profiler.mark("events")
+        self.event_dispatcher.flush()
+        if self.profiler is not None:
+            self.profiler.mark("flush")
 
 
 if __name__ == "__main__":
-    app = Runner()
+    parser = argparse.ArgumentParser(description="Chalkling-o-mat editor.")
+    parser.add_argument("--profile", action="store_true", help="show the frame profiler (toggle with F3)")
+    parser.add_argument("--trace", default=None, help="write a per frame trace of the profiler to this file")
+    args = parser.parse_args()
+    app = Runner(args.profile or args.trace is not None, args.trace)
     app.run()
     pygame.quit()
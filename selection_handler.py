@@ -1,12 +1,14 @@
 from abc import abstractmethod
 from enum import Enum
-from typing import List
+from typing import List, Iterable, Dict
 
 import pygame
 from pygame import Rect
 from pygame.event import Event
 
 from consts import SELECT_ELEMENT
+from slotted import Slotted
+from spatial_index import SpatialIndex
 
 
 class Marks(Enum):
@@ -15,21 +17,36 @@ class Marks(Enum):
     PREVIOUS = 2
     BEZIER = 3
 
+    @property
+    def bit(self) -> int:
+        return 1 << self.value
 
-class Selectable:
+
+class Selectable(Slotted):
+    __slots__ = ("marks",)
 
     def __init__(self):
-        self.marking: [Marks] = []
+        # Bit set of the marks (see Marks.bit)
+        self.marks: int = 0
+
+    def __setstate__(self, state):
+        # Elements stored before the marks became a bit set have a list of marks
+        if "marking" in state:
+            state = dict(state)
+            marking = state.pop("marking")
+            state["marks"] = 0
+            for mark in marking:
+                state["marks"] |= mark.bit
+        super().__setstate__(state)
 
     def mark(self, mark: Marks):
-        self.marking.append(mark)
+        self.marks |= mark.bit
 
     def unmark(self, mark: Marks):
-        if self.is_marked(mark):
-            self.marking = [x for x in self.marking if x != mark]
+        self.marks &= ~mark.bit
 
     def is_marked(self, mark: Marks):
-        return mark in self.marking
+        return self.marks & mark.bit != 0
 
     @abstractmethod
     def is_selected(self, selection: Rect) -> bool:
@@ -40,30 +57,84 @@ class Selectable:
         """
         pass
 
+    @abstractmethod
+    def get_bounds(self) -> Rect:
+        """
+        Bounding box that contains every position at which the item can be selected.
+        :return: bounding box
+        """
+        pass
+
 
 class SelectionHandler:
     def __init__(self):
-        # List of all possible selectables that can be selected with this handler
-        self._selectables: List[Selectable] = []
-        # Current selected selectables
-        self.selection: List[Selectable] = []
+        # All possible selectables that can be selected with this handler (dicts are used as ordered sets)
+        self._selectables: Dict[Selectable, None] = {}
+        # Current selected selectables in the order they got selected
+        self.selection: Dict[Selectable, None] = {}
+        # Bounding boxes of the selectables, built on the first query (None = outdated)
+        self._index: SpatialIndex | None = None
+
+    def __getstate__(self):
+        # The index is cheap to rebuild, copies and pickles leave it out
+        state = vars(self).copy()
+        state.pop("_index", None)
+        state.pop("_index_dirty", None)
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        # Forms stored before the selections were ordered sets
+        if isinstance(self._selectables, list):
+            self._selectables = dict.fromkeys(self._selectables)
+            self.selection = dict.fromkeys(self.selection)
+        # Forms stored with an index still have it in their state
+        vars(self).pop("_index_dirty", None)
+        self._index = None
+
+    def get_index(self) -> SpatialIndex:
+        if self._index is None:
+            self._index = SpatialIndex()
+            self._index.rebuild((selectable, selectable.get_bounds()) for selectable in self._selectables)
+        return self._index
 
     def add_selectables(self, selectables: List[Selectable]):
         """
         Add new selectables to this handler
         :param selectables: that are possible to select
         """
-        self._selectables.extend(selectables)
+        for selectable in selectables:
+            self._selectables[selectable] = None
+            if self._index is not None:
+                self._index.insert(selectable, selectable.get_bounds())
+
+    def update_selectables(self, selectables: Iterable[Selectable]):
+        """
+        Updates the bounding boxes of selectables that have been moved.
+        :param selectables: that have been moved
+        """
+        if self._index is None:
+            return
+        for selectable in selectables:
+            if selectable in self._index:
+                self._index.insert(selectable, selectable.get_bounds())
+
+    def invalidate_selectables(self):
+        """
+        Marks all bounding boxes as outdated, e.g. after all positions have changed.
+        """
+        self._index = None
 
     def remove_selectables(self, selectables: List[Selectable]):
         """
         Remove selectables from this handler.
         :param selectables: to remove
         """
-        for selectable in selectables:
-            # Remark: remove only removes first occurrence
-            self._selectables = [x for x in self._selectables if x != selectable]
-            self.selection = [x for x in self.selection if x != selectable]
+        for selectable in list(selectables):
+            self._selectables.pop(selectable, None)
+            self.selection.pop(selectable, None)
+            if self._index is not None:
+                self._index.remove(selectable)
 
     def get_selected(self, selection: Rect) -> List[Selectable]:
         """
@@ -72,7 +143,7 @@ class SelectionHandler:
         :return: selection
         """
         selected_elements = []
-        for selectable in self._selectables:
+        for selectable in self.get_index().query(selection):
             if selectable.is_selected(selection):
                 selected_elements.append(selectable)
         return selected_elements
@@ -84,16 +155,14 @@ class SelectionHandler:
         """
         for selectable in selectables:
             selectable.mark(Marks.SELECTED)
-        self.selection.extend(selectables)
-        pygame.event.post(Event(SELECT_ELEMENT, selection=self.selection))
+            self.selection[selectable] = None
+        pygame.event.post(Event(SELECT_ELEMENT, selection=list(self.selection)))
 
     def unselect(self, selectables: List[Selectable]):
         """
         Remove the mark from the selectables.
         :param selectables: to unmark
         """
-        for selectable in selectables:
+        for selectable in list(selectables):
             selectable.unmark(Marks.SELECTED)
-        for selectable in selectables:
-            # Remark: remove only removes first occurrence
-            self.selection = [x for x in self.selection if x != selectable]
+            self.selection.pop(selectable, None)
@@ -0,0 +1,137 @@
+"""
+Sharded dataset container.
+
+Instead of one png per variant the samples are packed into tar shards:
+
+    <folder>/shard-000000000.tar    <key>.png + <key>.json per sample
+    <folder>/index.jsonl            one line per finished shard (first key, count, labels, sha256)
+
+Shards are only listed in the index once they are completely written, so an interrupted job never leaves a
+half written shard behind that a reader would pick up. New jobs append new shards and continue the keys.
+"""
+import hashlib
+import io
+import json
+import os
+import tarfile
+from typing import List, Iterator, Tuple, Iterable
+
+INDEX_FILE = "index.jsonl"
+DEFAULT_SHARD_SIZE = 10000
+
+
+def get_shard_name(first_key: int) -> str:
+    return f"shard-{first_key:09d}.tar"
+
+
+def read_index(folder: str) -> List[dict]:
+    """
+    Reads all finished shards of the dataset folder.
+    :param folder: of the dataset
+    :return: index entries in the order they were written
+    """
+    index_path = os.path.join(folder, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, "r") as f:
+        return [json.loads(line) for line in f if line.strip() != ""]
+
+
+def append_index(folder: str, entry: dict):
+    with open(os.path.join(folder, INDEX_FILE), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def get_next_key(folder: str) -> int:
+    """
+    Key of the next sample that gets appended to the dataset.
+    :param folder: of the dataset
+    :return: next free key
+    """
+    return max((entry["first"] + entry["count"] for entry in read_index(folder)), default=0)
+
+
+def file_checksum(path: str) -> str:
+    checksum = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def _add_member(tar: tarfile.TarFile, name: str, data: bytes):
+    # Fixed metadata keeps the shard bytes reproducible
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = 0o644
+    tar.addfile(info, io.BytesIO(data))
+
+
+def write_shard(folder: str, first_key: int, samples: Iterable[Tuple[bytes, dict]]) -> dict:
+    """
+    Writes one shard. The shard is not part of the dataset until its entry is appended to the index.
+    :param folder: of the dataset
+    :param first_key: key of the first sample, the following samples get consecutive keys
+    :param samples: encoded png and meta data (stats, label, ...) of every sample
+    :return: index entry of the shard
+    """
+    name = get_shard_name(first_key)
+    path = os.path.join(folder, name)
+    count = 0
+    labels = set()
+    with tarfile.open(path, "w", format=tarfile.USTAR_FORMAT) as tar:
+        for png, meta in samples:
+            key = first_key + count
+            _add_member(tar, f"{key}.png", png)
+            _add_member(tar, f"{key}.json", json.dumps(meta, sort_keys=True).encode("utf-8"))
+            labels.add(meta.get("label"))
+            count += 1
+    return {"shard": name, "first": first_key, "count": count, "labels": sorted(labels - {None}),
+            "sha256": file_checksum(path)}
+
+
+def iterate_shard(path: str) -> Iterator[Tuple[int, bytes, dict]]:
+    """
+    Streams the samples of one shard sequentially.
+    :param path: of the shard
+    :return: key, encoded png and meta data of every sample
+    """
+    png: bytes | None = None
+    with tarfile.open(path, "r|") as tar:
+        for member in tar:
+            key, extension = os.path.splitext(member.name)
+            data = tar.extractfile(member).read()
+            if extension == ".png":
+                png = data
+            elif extension == ".json":
+                yield int(key), png, json.loads(data)
+                png = None
+
+
+class ShardReader:
+    """
+    Reads the samples of a sharded dataset folder shard by shard.
+    """
+
+    def __init__(self, folder: str, verify: bool = True):
+        self.folder = folder
+        self.verify = verify
+        self.shards: List[dict] = read_index(folder)
+
+    def __len__(self):
+        return sum(entry["count"] for entry in self.shards)
+
+    def get_labels(self) -> List[str]:
+        return sorted({label for entry in self.shards for label in entry["labels"]})
+
+    def read_shard(self, entry: dict) -> Iterator[Tuple[int, bytes, dict]]:
+        path = os.path.join(self.folder, entry["shard"])
+        if self.verify and file_checksum(path) != entry["sha256"]:
+            raise ValueError(f"Checksum of shard {entry['shard']} does not match the index")
+        return iterate_shard(path)
+
+    def __iter__(self) -> Iterator[Tuple[int, bytes, dict]]:
+        for entry in self.shards:
+            yield from self.read_shard(entry)
@@ -0,0 +1,35 @@
+from functools import cache
+from typing import Tuple
+
+
+@cache
+def get_slot_names(cls: type) -> Tuple[str, ...]:
+    """
+    Collects the slots of the class and all its base classes.
+    :param cls: to collect the slots of
+    :return: slot names
+    """
+    names = []
+    for base in reversed(cls.__mro__):
+        slots = base.__dict__.get("__slots__", ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+    return tuple(names)
+
+
+class Slotted:
+    """
+    Base of the small model classes that keep their attributes in __slots__ instead of a dict per instance.
+
+    The state is pickled as attribute dict, so files written before the classes had slots still load.
+    Attributes that do not exist anymore are dropped.
+    """
+    __slots__ = ()
+
+    def __getstate__(self) -> dict:
+        return {name: getattr(self, name) for name in get_slot_names(type(self)) if hasattr(self, name)}
+
+    def __setstate__(self, state: dict):
+        names = get_slot_names(type(self))
+        for name, value in state.items():
+            if name in names:
+                setattr(self, name, value)
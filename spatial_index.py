@@ -0,0 +1,80 @@
+from typing import Dict, List, Tuple, Set, Iterable
+
+from pygame import Rect
+
+Cell = Tuple[int, int]
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the bounding boxes of items. Every item is registered in all cells its box touches,
+    so a query only has to look at the items of the cells the query rect touches.
+    """
+
+    def __init__(self, cell_size: int = 32):
+        self.cell_size = cell_size
+        self._cells: Dict[Cell, Set[any]] = {}
+        # item -> (cells of the item, insertion order)
+        self._entries: Dict[any, Tuple[List[Cell], int]] = {}
+        self._counter = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item) -> bool:
+        return item in self._entries
+
+    def get_cells(self, rect: Rect) -> List[Cell]:
+        x0 = rect.left // self.cell_size
+        x1 = rect.right // self.cell_size
+        y0 = rect.top // self.cell_size
+        y1 = rect.bottom // self.cell_size
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+    def insert(self, item, rect: Rect):
+        """
+        Adds the item or moves it to the new bounding box. Items keep their insertion order when they get moved.
+        :param item: to add
+        :param rect: bounding box of the item
+        """
+        if item in self._entries:
+            order = self._entries[item][1]
+            self.remove(item)
+        else:
+            order = self._counter
+            self._counter += 1
+        cells = self.get_cells(rect)
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(item)
+        self._entries[item] = (cells, order)
+
+    def remove(self, item):
+        entry = self._entries.pop(item, None)
+        if entry is None:
+            return
+        for cell in entry[0]:
+            items = self._cells[cell]
+            items.discard(item)
+            if len(items) == 0:
+                del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._entries.clear()
+
+    def query(self, rect: Rect) -> List[any]:
+        """
+        Gets all items whose bounding box shares a cell with the rect.
+        :param rect: to query
+        :return: candidates in insertion order
+        """
+        candidates = set()
+        for cell in self.get_cells(rect):
+            candidates.update(self._cells.get(cell, ()))
+        return sorted(candidates, key=lambda item: self._entries[item][1])
+
+    def rebuild(self, items: Iterable[Tuple[any, Rect]]):
+        self.clear()
+        self._counter = 0
+        for item, rect in items:
+            self.insert(item, rect)
@@ -0,0 +1,28 @@
+from slotted import Slotted
+
+
+class Stats(Slotted):
+    __slots__ = ("attack", "defense", "speed", "life", "aesthetic")
+
+    def __init__(self):
+        self.attack: float = 0.5
+        self.defense: float = 0.5
+        self.speed: float = 0.5
+        self.life: float = 0.5
+        self.aesthetic: float = 0.5
+
+    def to_dict(self) -> dict:
+        return self.__getstate__()
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "Stats":
+        stats = cls()
+        stats.__setstate__(values)
+        return stats
+
+    def scale(self, factor):
+        self.attack *= factor
+        self.defense *= factor
+        self.speed *= factor
+        self.life *= factor
+        self.aesthetic *= factor
@@ -0,0 +1,120 @@
+"""
+Telemetry of the export pipeline.
+
+Every unit of work (a chunk of copies or a shard) measures its stages with a StageTimer, the ExportTelemetry of
+the job sums them up and emits one record per finished unit to a JSON-lines file and/or a callback:
+
+    {"event": "start", "kind": "png", "seed": .., "total": 1000, "workers": 4, "time": ..}
+    {"event": "progress", "done": 256, "total": 1000, "elapsed": 1.2, "images_per_second": 213.3,
+     "bytes_written": 612345, "eta": 3.5, "stages": {"sample": 0.01, "similarity": 0.002, "render": 0.6, ..}}
+    {"event": "done", ..same fields as progress..}
+
+The stage seconds are summed over all worker processes, images per second and the ETA use the wall clock time
+of the job. The stage with the most seconds is the bottleneck of the machine. The written bytes are the bytes of
+the encoded pngs, shards add their tar headers and json meta data on top.
+"""
+import json
+import time
+from typing import Dict, Callable
+
+STAGES = ("sample", "similarity", "render", "encode", "write")
+
+
+class StageTimer:
+    """
+    Seconds per stage of one unit of work, a stage gets the time since the previous mark.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self.images = 0
+        self.bytes_written = 0
+        self._last_mark = time.perf_counter()
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.seconds[stage] += now - self._last_mark
+        self._last_mark = now
+
+    def add_file(self, size: int):
+        """
+        Counts an encoded image.
+        :param size: of the encoded png in bytes
+        """
+        self.images += 1
+        self.bytes_written += size
+
+
+def format_record(record: dict) -> str:
+    if record["event"] == "start":
+        return f"export of {record['total']} copies started (seed {record['seed']})"
+    if record["event"] == "done":
+        stages = ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in record["stages"].items())
+        return (f"{record['done']} copies exported in {record['elapsed']:.1f} s "
+                f"({record['images_per_second']:.1f} images/s, {record['bytes_written'] / 1e6:.1f} MB), "
+                f"stages: {stages}")
+    bottleneck = max(record["stages"], key=record["stages"].get)
+    eta = f"{record['eta']:.0f} s" if record["eta"] is not None else "unknown"
+    return (f"{record['done']}/{record['total']} copies, {record['images_per_second']:.1f} images/s, "
+            f"{record['bytes_written'] / 1e6:.1f} MB, eta {eta}, slowest stage {bottleneck}")
+
+
+class ExportTelemetry:
+    def __init__(self, file: str | None = None, callback: Callable[[dict], None] | None = None):
+        """
+        :param file: JSON-lines file the records get appended to
+        :param callback: called with every record
+        """
+        self.file = file
+        self.callback = callback
+        self.total = 0
+        self.done = 0
+        self.bytes_written = 0
+        self.seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+        self._start = 0.0
+
+    def emit(self, record: dict):
+        if self.file is not None:
+            # Appended line by line, so a killed job still leaves a readable trace
+            with open(self.file, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        if self.callback is not None:
+            self.callback(record)
+
+    def start(self, kind: str, seed: int, total: int, workers: int):
+        """
+        Starts measuring a job.
+        :param kind: of the export (png or shards)
+        :param seed: of the job
+        :param total: number of copies the job renders
+        :param workers: number of processes the job renders with
+        """
+        self.total = total
+        self.done = 0
+        self.bytes_written = 0
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self._start = time.perf_counter()
+        self.emit({"event": "start", "kind": kind, "seed": seed, "total": total, "workers": workers,
+                   "time": time.time()})
+
+    def get_record(self, event: str) -> dict:
+        elapsed = time.perf_counter() - self._start
+        images_per_second = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / images_per_second if images_per_second > 0 else None
+        return {"event": event, "done": self.done, "total": self.total, "elapsed": elapsed,
+                "images_per_second": images_per_second, "bytes_written": self.bytes_written, "eta": eta,
+                "stages": dict(self.seconds)}
+
+    def add(self, timer: StageTimer):
+        """
+        Adds a finished unit of work and emits the progress of the job.
+        :param timer: of the unit
+        """
+        self.done += timer.images
+        self.bytes_written += timer.bytes_written
+        for stage, seconds in timer.seconds.items():
+            self.seconds[stage] += seconds
+        self.emit(self.get_record("progress"))
+
+    def finish(self):
+        self.emit(self.get_record("done"))
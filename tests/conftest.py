@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+# The modules live in the repository root, pygame runs without a window
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+FORM_FILE = os.path.join(ROOT, "base_forms", "tortoise.npz")
+
+
+@pytest.fixture
+def compiled_form():
+    from compiled_form import load_compiled_form
+    return load_compiled_form(FORM_FILE)
+
+
+@pytest.fixture
+def form_file():
+    return FORM_FILE
+
+
+@pytest.fixture
+def root_folder():
+    return ROOT
+
+
+def read_png_folder(folder: str) -> dict:
+    """
+    Reads all png files of a folder.
+    :param folder: to read
+    :return: file name -> file content
+    """
+    files = {}
+    for file in os.listdir(folder):
+        if file.endswith(".png"):
+            with open(os.path.join(folder, file), "rb") as f:
+                files[file] = f.read()
+    return files
+
+
+@pytest.fixture
+def read_pngs():
+    return read_png_folder
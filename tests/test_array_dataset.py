@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from array_dataset import pack_png_folders, open_arrays, read_label_names, STAT_KEYS, IMAGES_FILE
+
+
+def write_png(path, image: np.ndarray, stats: dict):
+    info = PngInfo()
+    for key, value in stats.items():
+        info.add_text(key, str(value))
+    Image.fromarray(image).save(path, pnginfo=info)
+
+
+def create_tree(folder, shapes: dict) -> dict:
+    """
+    Writes one label folder per entry with a png of every given shape.
+    :return: path -> (image, stats) of every png
+    """
+    rng = np.random.default_rng(0)
+    written = {}
+    for label, label_shapes in shapes.items():
+        os.makedirs(folder / label)
+        for i, shape in enumerate(label_shapes):
+            image = rng.integers(0, 256, size=shape, dtype=np.uint8)
+            stats = {key: float(i + k) for k, key in enumerate(STAT_KEYS)}
+            write_png(folder / label / f"{i}.png", image, stats)
+            written[(label, i)] = image, stats
+    return written
+
+
+def test_png_tree_round_trips(tmp_path):
+    written = create_tree(tmp_path / "data", {"bird": [(16, 24)] * 2, "empty": [], "tortoise": [(16, 24)]})
+    # Neither files next to the label folders nor other files inside them are samples
+    (tmp_path / "data" / "manifest.jsonl").write_text("")
+    (tmp_path / "data" / "bird" / "notes.txt").write_text("")
+
+    assert pack_png_folders(str(tmp_path / "data"), str(tmp_path / "packed")) == 3
+    images, stats, labels = open_arrays(str(tmp_path / "packed"))
+
+    assert all(isinstance(array, np.memmap) for array in (images, stats, labels))
+    assert read_label_names(str(tmp_path / "packed")) == ["bird", "empty", "tortoise"]
+    np.testing.assert_array_equal(labels, [0, 0, 2])
+    for i, key in enumerate([("bird", 0), ("bird", 1), ("tortoise", 0)]):
+        image, sample_stats = written[key]
+        np.testing.assert_array_equal(images[i], image)
+        np.testing.assert_array_equal(stats[i], [sample_stats[stat] for stat in STAT_KEYS])
+
+
+def test_empty_tree_still_has_images(tmp_path):
+    create_tree(tmp_path / "data", {"empty": []})
+
+    assert pack_png_folders(str(tmp_path / "data"), str(tmp_path / "packed")) == 0
+    images, stats, labels = open_arrays(str(tmp_path / "packed"))
+    assert images.shape == (0, 128, 128)
+    assert stats.shape == (0, len(STAT_KEYS))
+    assert labels.shape == (0,)
+    assert read_label_names(str(tmp_path / "packed")) == ["empty"]
+
+
+def test_mixed_sizes_are_rejected_before_packing(tmp_path):
+    create_tree(tmp_path / "data", {"bird": [(16, 24)], "tortoise": [(32, 32)]})
+
+    with pytest.raises(ValueError, match="24x16.*32x32"):
+        pack_png_folders(str(tmp_path / "data"), str(tmp_path / "packed"))
+    assert not os.path.exists(tmp_path / "packed" / IMAGES_FILE)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from bezier import flatness_segments, adaptive_bezier_curves, bezier_curves, BEZIER_TOLERANCE, MAX_BEZIER_SEGMENTS
+
+STEPS_PER_SEGMENT = 16
+
+
+def random_curves(count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(0, 128, size=(count, 4, 2))
+
+
+def get_max_deviation(control_points: np.ndarray, polyline: np.ndarray) -> float:
+    """
+    Distance between the curve and the polyline at the same parameter, sampled densely along every segment.
+    """
+    segments = len(polyline) - 1
+    curve = bezier_curves(control_points, segments * STEPS_PER_SEGMENT + 1)
+    fraction = (np.arange(len(curve)) % STEPS_PER_SEGMENT / STEPS_PER_SEGMENT)[:, np.newaxis]
+    starts = np.minimum(np.arange(len(curve)) // STEPS_PER_SEGMENT, segments - 1)
+    fraction[-1] = 1.0
+    lines = polyline[starts] + (polyline[starts + 1] - polyline[starts]) * fraction
+    return float(np.linalg.norm(curve - lines, axis=-1).max())
+
+
+def test_straight_curves_get_one_segment():
+    starts = random_curves(10)[:, 0]
+    ends = random_curves(10, seed=1)[:, 0]
+    straight = starts[:, np.newaxis] + (ends - starts)[:, np.newaxis] * np.linspace(0, 1, 4)[:, np.newaxis]
+
+    np.testing.assert_array_equal(flatness_segments(straight), 1)
+    for control_points, polyline in zip(straight, adaptive_bezier_curves(straight)):
+        assert len(polyline) == 2
+        np.testing.assert_allclose(polyline[[0, -1]], control_points[[3, 0]])
+
+
+def test_segments_grow_as_the_tolerance_shrinks():
+    curves = random_curves(100)
+    counts = [flatness_segments(curves, tolerance) for tolerance in (2.0, 1.0, BEZIER_TOLERANCE, 0.1)]
+    for coarse, fine in zip(counts, counts[1:]):
+        assert np.all(fine >= coarse)
+        assert np.any(fine > coarse)
+    assert np.all(counts[-1] <= MAX_BEZIER_SEGMENTS)
+
+
+def test_polylines_stay_within_tolerance():
+    curves = random_curves(200)
+    # Curves that hit the segment limit can deviate more
+    curves = curves[flatness_segments(curves) < MAX_BEZIER_SEGMENTS]
+    assert len(curves) > 100
+
+    polylines = adaptive_bezier_curves(curves)
+    for control_points, polyline, segments in zip(curves, polylines, flatness_segments(curves)):
+        assert len(polyline) == segments + 1
+        assert get_max_deviation(control_points, polyline) <= BEZIER_TOLERANCE
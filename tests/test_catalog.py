@@ -0,0 +1,58 @@
+import os
+import shutil
+
+import numpy as np
+
+from catalog import Catalog, CATALOG_FOLDER
+from compiled_form import CompiledForm, save_compiled_form
+from consts import BodyPart
+
+
+def create_folder(folder, form_file, compiled_form):
+    os.makedirs(folder)
+    shutil.copy(form_file, folder / "tortoise.npz")
+    # A straight form that only has legs
+    arrays = {name: np.array(array) for name, array in compiled_form.get_arrays().items()}
+    arrays["curves"][:] = False
+    arrays["body_parts"][:] = BodyPart.LEG.value
+    save_compiled_form(CompiledForm.from_arrays(arrays, compiled_form.form_point_count, compiled_form.stats),
+                       str(folder / "straight.npz"))
+    # Unpickling this would fail, the catalog must only list it
+    (folder / "old.pickle").write_bytes(b"not a pickle")
+
+
+def test_catalog_updates_incrementally(tmp_path, form_file, compiled_form):
+    create_folder(tmp_path / "forms", form_file, compiled_form)
+    catalog = Catalog(str(tmp_path / "forms"))
+
+    assert catalog.update()
+    assert catalog.get_names() == ["old.pickle", "straight.npz", "tortoise.npz"]
+    assert catalog.is_legacy("old.pickle")
+    assert not catalog.is_legacy("tortoise.npz")
+    assert os.path.exists(catalog.get_thumbnail_path("tortoise.npz"))
+
+    reopened = Catalog(str(tmp_path / "forms"))
+    assert not reopened.update()
+    assert reopened.entries == catalog.entries
+
+    os.remove(tmp_path / "forms" / "straight.npz")
+    assert reopened.update()
+    assert reopened.get_names() == ["old.pickle", "tortoise.npz"]
+    assert os.path.isdir(tmp_path / "forms" / CATALOG_FOLDER)
+
+
+def test_filter_skips_legacy_forms(tmp_path, form_file, compiled_form):
+    create_folder(tmp_path / "forms", form_file, compiled_form)
+    catalog = Catalog(str(tmp_path / "forms"))
+    catalog.update()
+    points = compiled_form.form_point_count
+
+    assert catalog.filter() == ["straight.npz", "tortoise.npz"]
+    assert catalog.filter(body_parts=["LEG"]) == ["straight.npz", "tortoise.npz"]
+    assert catalog.filter(body_parts=["LEG", "TAIL"]) == ["tortoise.npz"]
+    assert catalog.filter(body_parts=["WING"]) == []
+    assert catalog.filter(curves=True) == ["tortoise.npz"]
+    assert catalog.filter(curves=False) == ["straight.npz"]
+    assert catalog.filter(min_points=points, max_points=points) == ["straight.npz", "tortoise.npz"]
+    assert catalog.filter(min_points=points + 1) == []
+    assert catalog.filter(max_points=points - 1) == []
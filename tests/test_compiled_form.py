@@ -0,0 +1,35 @@
+import numpy as np
+
+from exporter import Exporter, encode_png
+
+
+def test_variants_do_not_depend_on_their_batch(compiled_form):
+    batch = compiled_form.sample_indexed(11, range(5, 15))
+    for i, index in enumerate(range(5, 15)):
+        np.testing.assert_array_equal(batch[i], compiled_form.sample_indexed(11, [index])[0])
+        np.testing.assert_array_equal(batch[i], compiled_form.create_variant(11, index).positions)
+
+    low, high = compiled_form.get_sample_bounds()
+    assert np.all(batch >= low) and np.all(batch <= high)
+    np.testing.assert_array_equal(compiled_form.get_deviation(batch)[3], compiled_form.get_deviation(batch[3:4])[0])
+
+
+def test_seed_and_form_change_variants(compiled_form):
+    positions = compiled_form.sample_indexed(11, range(4))
+    assert not np.array_equal(positions, compiled_form.sample_indexed(12, range(4)))
+    assert not np.array_equal(positions[0], positions[1])
+
+    scaled = compiled_form.copy()
+    scaled.scale(2.0)
+    assert scaled.get_form_id() != compiled_form.get_form_id()
+    assert compiled_form.copy().get_form_id() == compiled_form.get_form_id()
+
+
+def test_exported_variants_can_be_regenerated(compiled_form, tmp_path):
+    exporter = Exporter(compiled_form)
+    exporter.export(str(tmp_path), 6, seed=5)
+    for index in range(6):
+        stats, pixels = exporter.render_variant(5, index)
+        png = encode_png(pixels, stats, exporter.compress_level, exporter.get_sample_meta(5, index))
+        with open(tmp_path / f"{index}.png", "rb") as f:
+            assert f.read() == png
@@ -0,0 +1,65 @@
+import pygame
+from pygame.event import Event
+
+from event_dispatcher import EventDispatcher
+
+FIRST_EVENT = pygame.USEREVENT + 100
+SECOND_EVENT = pygame.USEREVENT + 101
+
+
+def record(calls: list, name: str, consume: bool = False):
+    def listener(event: Event) -> bool:
+        calls.append(name)
+        return consume
+    return listener
+
+
+def test_listeners_run_in_registration_order():
+    dispatcher = EventDispatcher()
+    element = object()
+    calls = []
+    dispatcher.listen(record(calls, "any"))
+    dispatcher.listen(record(calls, "element"), element=element, event_type=FIRST_EVENT)
+    dispatcher.listen(record(calls, "type"), event_type=FIRST_EVENT)
+    dispatcher.listen(record(calls, "other type"), event_type=SECOND_EVENT)
+    dispatcher.listen(record(calls, "other element"), element=object(), event_type=FIRST_EVENT)
+    dispatcher.listen(record(calls, "element of any type"), element=element)
+
+    dispatcher.process_event(Event(FIRST_EVENT, ui_element=element))
+    assert calls == ["any", "element", "type", "element of any type"]
+
+    calls.clear()
+    dispatcher.process_event(Event(FIRST_EVENT))
+    assert calls == ["any", "type"]
+
+
+def test_consumed_events_stop_but_reach_observers():
+    dispatcher = EventDispatcher()
+    calls = []
+    observed = []
+    dispatcher.listen(record(calls, "first"), event_type=FIRST_EVENT)
+    dispatcher.listen(record(calls, "consumer", consume=True), event_type=FIRST_EVENT)
+    dispatcher.listen(record(calls, "last"), event_type=FIRST_EVENT)
+    dispatcher.observe(lambda event: observed.append(event.type))
+
+    dispatcher.process_event(Event(FIRST_EVENT))
+    assert calls == ["first", "consumer"]
+    assert observed == [FIRST_EVENT]
+
+
+def test_coalesced_events_merge_their_payloads():
+    dispatcher = EventDispatcher()
+    events = []
+    dispatcher.listen_coalesced(lambda event: events.append(event) or False, [FIRST_EVENT, SECOND_EVENT])
+
+    dispatcher.process_event(Event(FIRST_EVENT, seed=7, value=1))
+    dispatcher.process_event(Event(SECOND_EVENT, value=2))
+    assert events == []
+
+    dispatcher.flush()
+    assert len(events) == 1
+    assert events[0].type == SECOND_EVENT
+    assert events[0].seed == 7 and events[0].value == 2
+
+    dispatcher.flush()
+    assert len(events) == 1
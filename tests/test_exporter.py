@@ -0,0 +1,65 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+import exporter as exporter_module
+from exporter import Exporter, SAMPLE_BATCH_SIZE, encode_png
+from rasterizer import rasterize_form
+
+
+def test_export_is_independent_of_worker_count(compiled_form, tmp_path, read_pngs):
+    copies = SAMPLE_BATCH_SIZE + 20
+    exporter = Exporter(compiled_form)
+    assert exporter.export(str(tmp_path / "single"), copies, seed=7, workers=1) == copies
+    assert exporter.export(str(tmp_path / "pool"), copies, seed=7, workers=3) == copies
+
+    single = read_pngs(tmp_path / "single")
+    assert sorted(single) == sorted(f"{i}.png" for i in range(copies))
+    assert single == read_pngs(tmp_path / "pool")
+
+
+def test_export_seed_changes_variants(compiled_form, tmp_path, read_pngs):
+    exporter = Exporter(compiled_form)
+    exporter.export(str(tmp_path / "a"), 4, seed=1)
+    exporter.export(str(tmp_path / "b"), 4, seed=2)
+    assert read_pngs(tmp_path / "a") != read_pngs(tmp_path / "b")
+
+
+def test_png_carries_stats_and_meta(compiled_form):
+    exporter = Exporter(compiled_form, grayscale=True)
+    stats, pixels = exporter.render_variant(3, 5)
+    png = encode_png(pixels, stats, compress_level=1, meta=exporter.get_sample_meta(3, 5))
+
+    with Image.open(io.BytesIO(png)) as image:
+        assert image.mode == "L"
+        assert image.size == (pixels.shape[1], pixels.shape[0])
+        np.testing.assert_array_equal(np.asarray(image), pixels)
+        text = image.text
+    for key, value in stats.to_dict().items():
+        assert float(text[key]) == value
+    assert int(text["seed"]) == 3
+    assert int(text["variant"]) == 5
+    assert int(text["form_id"]) == compiled_form.get_form_id()
+
+
+def test_render_range_rasterizes_in_bounded_batches(compiled_form, monkeypatch):
+    exporter = Exporter(compiled_form, rasterizer="numpy")
+    expected = {index: exporter.render_variant(9, index) for index in (3, 7, 12)}
+    batch_sizes = []
+
+    def rasterize(form, positions, *args):
+        batch_sizes.append(len(positions))
+        return rasterize_form(form, positions, *args)
+
+    monkeypatch.setattr(exporter_module, "SAMPLE_BATCH_SIZE", 4)
+    monkeypatch.setattr(exporter_module, "rasterize_form", rasterize)
+    rendered = [(copy_index, stats, np.array(pixels)) for copy_index, stats, pixels
+                in exporter.render_range(range(3, 13), 9)]
+
+    assert batch_sizes == [4, 4, 2]
+    assert [copy_index for copy_index, _, _ in rendered] == list(range(3, 13))
+    for copy_index, stats, pixels in rendered:
+        if copy_index in expected:
+            assert stats.to_dict() == expected[copy_index][0].to_dict()
+            np.testing.assert_array_equal(pixels, expected[copy_index][1])
@@ -0,0 +1,94 @@
+import io
+import json
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import form_file as form_format
+from compiled_form import load_compiled_form
+from form_file import read_form_file, write_form_file, FORMAT_VERSION, FORM_ARRAYS, HEADER, FormFile
+
+
+def write_to_buffer(form: FormFile) -> io.BytesIO:
+    buffer = io.BytesIO()
+    write_form_file(buffer, form.arrays, form.form_point_count, form.stats)
+    buffer.seek(0)
+    return buffer
+
+
+def write_raw(header: dict, arrays: dict) -> io.BytesIO:
+    buffer = io.BytesIO()
+    header_bytes = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+    np.savez(buffer, **{HEADER: header_bytes}, **arrays)
+    buffer.seek(0)
+    return buffer
+
+
+def test_round_trip(form_file):
+    form = read_form_file(form_file)
+    copy = read_form_file(write_to_buffer(form))
+
+    assert copy.form_point_count == form.form_point_count
+    assert copy.stats == form.stats
+    for name in FORM_ARRAYS:
+        assert copy.arrays[name].dtype == form.arrays[name].dtype
+        np.testing.assert_array_equal(copy.arrays[name], form.arrays[name])
+
+
+def test_older_versions_get_migrated(form_file, monkeypatch):
+    form = read_form_file(form_file)
+    old_arrays = {("old_widths" if name == "widths" else name): array for name, array in form.arrays.items()}
+    header = {"format": form_format.FORMAT_NAME, "version": FORMAT_VERSION - 1,
+              "form_point_count": form.form_point_count, "stats": form.stats}
+
+    def migrate(old_header, arrays):
+        arrays = dict(arrays)
+        arrays["widths"] = arrays.pop("old_widths") * 2
+        return {**old_header, "version": old_header["version"] + 1}, arrays
+
+    monkeypatch.setitem(form_format.MIGRATIONS, FORMAT_VERSION - 1, migrate)
+    migrated = read_form_file(write_raw(header, old_arrays))
+
+    assert migrated.form_point_count == form.form_point_count
+    np.testing.assert_array_equal(migrated.arrays["widths"], form.arrays["widths"] * 2)
+    np.testing.assert_array_equal(migrated.arrays["positions"], form.arrays["positions"])
+
+
+def test_invalid_files_are_rejected(form_file):
+    form = read_form_file(form_file)
+    header = {"format": form_format.FORMAT_NAME, "version": FORMAT_VERSION,
+              "form_point_count": form.form_point_count, "stats": form.stats}
+
+    with pytest.raises(ValueError, match="newer"):
+        read_form_file(write_raw({**header, "version": FORMAT_VERSION + 1}, form.arrays))
+    with pytest.raises(ValueError, match="curves"):
+        read_form_file(write_raw(header, {name: a for name, a in form.arrays.items() if name != "curves"}))
+    with pytest.raises(ValueError, match="unknown format"):
+        read_form_file(write_raw({**header, "format": "other"}, form.arrays))
+    with pytest.raises(ValueError, match="version is missing"):
+        read_form_file(write_raw({name: value for name, value in header.items() if name != "version"}, form.arrays))
+
+    buffer = io.BytesIO()
+    np.savez(buffer, positions=form.arrays["positions"])
+    buffer.seek(0)
+    with pytest.raises(ValueError, match="header is missing"):
+        read_form_file(buffer)
+
+
+def test_loading_does_not_import_pygame(form_file, root_folder):
+    code = ("import sys; from compiled_form import load_compiled_form; "
+            f"load_compiled_form({form_file!r}); "
+            "print(any(name.split('.')[0] in ('pygame', 'pygame_gui') for name in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=root_folder, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_only_legacy_files_get_unpickled(compiled_form, tmp_path):
+    pickled = pickle.dumps(compiled_form.get_arrays())
+    for name in ("corrupt.npz", "form.dat"):
+        (tmp_path / name).write_bytes(pickled)
+        with pytest.raises(ValueError):
+            load_compiled_form(str(tmp_path / name))
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from chalkling import main
+from exporter import Exporter, SAMPLE_BATCH_SIZE
+from manifest import ExportManifest, MANIFEST_FILE
+
+COPIES = SAMPLE_BATCH_SIZE + 10
+
+
+def start_interrupted_job(exporter: Exporter, folder: str, seed: int) -> dict:
+    """
+    Starts a job and only commits its first batch, like a job that was killed while rendering the second one.
+    """
+    os.makedirs(folder, exist_ok=True)
+    manifest = ExportManifest(folder)
+    job = manifest.start_job(seed, exporter.compiled_form.get_form_id(), COPIES, 0, exporter.get_params())
+    files, _ = exporter.export_range(folder, 0, range(SAMPLE_BATCH_SIZE), seed)
+    manifest.commit_batch(job["job"], 0, files)
+    with open(os.path.join(folder, MANIFEST_FILE), "a") as f:
+        f.write('{"type": "batch", "job": 0, "sta')
+    return job
+
+
+def test_resume_finishes_the_interrupted_job(compiled_form, tmp_path, read_pngs):
+    exporter = Exporter(compiled_form)
+    exporter.export(str(tmp_path / "complete"), COPIES, seed=3)
+    start_interrupted_job(exporter, str(tmp_path / "resumed"), 3)
+
+    assert exporter.resume(str(tmp_path / "resumed")) == COPIES - SAMPLE_BATCH_SIZE
+    assert read_pngs(tmp_path / "resumed") == read_pngs(tmp_path / "complete")
+
+    manifest = ExportManifest(str(tmp_path / "resumed"))
+    assert manifest.get_unfinished_job() is None
+    assert [batch["start"] for batch in manifest.get_committed(0)] == [0, SAMPLE_BATCH_SIZE]
+    assert exporter.resume(str(tmp_path / "resumed")) is None
+
+
+def test_jobs_continue_the_numbering(compiled_form, tmp_path, read_pngs):
+    exporter = Exporter(compiled_form)
+    exporter.export(str(tmp_path), 3, seed=1)
+    exporter.export(str(tmp_path), 2, seed=2)
+
+    assert sorted(read_pngs(tmp_path)) == sorted(f"{i}.png" for i in range(5))
+    jobs = ExportManifest(str(tmp_path)).jobs
+    assert [(job["first"], job["copies"], job["seed"]) for job in jobs.values()] == [(0, 3, 1), (3, 2, 2)]
+
+
+def test_folders_without_manifest_continue_after_the_last_file(compiled_form, tmp_path, read_pngs):
+    for file in ("0.png", "5.png", "cover.png"):
+        (tmp_path / file).write_bytes(b"")
+    Exporter(compiled_form).export(str(tmp_path), 2, seed=1)
+
+    assert sorted(read_pngs(tmp_path)) == sorted(["0.png", "5.png", "6.png", "7.png", "cover.png"])
+    assert (tmp_path / "5.png").read_bytes() == b""
+
+
+def test_resume_needs_the_same_form_and_parameters(compiled_form, tmp_path):
+    start_interrupted_job(Exporter(compiled_form), str(tmp_path), 3)
+
+    with pytest.raises(ValueError):
+        Exporter(compiled_form, grayscale=True).resume(str(tmp_path))
+    scaled = compiled_form.copy()
+    scaled.scale(2.0)
+    with pytest.raises(ValueError):
+        Exporter(scaled).resume(str(tmp_path))
+
+
+def test_shard_exports_can_not_be_resumed(form_file, tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(["export", "--form", form_file, "--out", str(tmp_path), "--format", "shards", "--resume"])
+    assert "--resume" in capsys.readouterr().err
+    assert os.listdir(tmp_path) == []
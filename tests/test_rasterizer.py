@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from exporter import Exporter, EXPORT_BACKGROUND
+from rasterizer import rasterize_segments
+
+
+def dilate(mask: np.ndarray) -> np.ndarray:
+    padded = np.pad(mask, 1)
+    height, width = mask.shape
+    return np.any([padded[y:y + height, x:x + width] for y in range(3) for x in range(3)], axis=0)
+
+
+@pytest.mark.parametrize("size", [64, 128, 256])
+def test_numpy_rasterizer_matches_pygame(compiled_form, size):
+    reference = Exporter(compiled_form, size=(size, size), grayscale=True, rasterizer="pygame")
+    exporter = Exporter(compiled_form, size=(size, size), grayscale=True, rasterizer="numpy")
+    for variant in range(4):
+        _, reference_pixels = reference.render_variant(11, variant)
+        _, pixels = exporter.render_variant(11, variant)
+        assert pixels.shape == reference_pixels.shape
+        assert pixels.min() == EXPORT_BACKGROUND[0]
+
+        # The antialiased strokes may only differ from the pygame lines at their border
+        reference_strokes = reference_pixels > 127
+        strokes = pixels > 127
+        assert not np.any(reference_strokes & ~dilate(strokes))
+        assert np.count_nonzero(strokes & ~dilate(reference_strokes)) < 0.02 * np.count_nonzero(strokes)
+        assert abs(np.count_nonzero(strokes) / np.count_nonzero(reference_strokes) - 1) < 0.2
+
+
+def test_batch_matches_single_variants(compiled_form):
+    exporter = Exporter(compiled_form, grayscale=True, rasterizer="numpy")
+    batch = [np.array(pixels) for _, _, pixels in exporter.render_range(range(4), 5)]
+    for variant, pixels in enumerate(batch):
+        np.testing.assert_array_equal(pixels, exporter.render_variant(5, variant)[1])
+
+
+def test_segment_coverage():
+    segments = np.array([[[[2.0, 8.0], [14.0, 8.0]]]])
+    image = rasterize_segments(segments, np.array([4]), (16, 16), background=0, foreground=255)[0]
+    assert image.shape == (16, 16)
+    # Full coverage on the stroke, nothing far away from it
+    assert np.all(image[7:9, 4:12] == 255)
+    assert np.all(image[:4] == 0) and np.all(image[13:] == 0)
+    np.testing.assert_array_equal(image, image[::-1])
@@ -0,0 +1,70 @@
+import copy
+import pickle
+
+from pygame import Rect
+
+from compiled_form import get_bit_mask
+from consts import BodyPart, BodyFeature
+from selection_handler import Selectable, SelectionHandler, Marks
+
+
+class Box(Selectable):
+    __slots__ = ("rect",)
+
+    def __init__(self, rect: Rect):
+        super().__init__()
+        self.rect = rect
+
+    def is_selected(self, selection: Rect) -> bool:
+        return self.rect.colliderect(selection)
+
+    def get_bounds(self) -> Rect:
+        return self.rect
+
+
+def test_bit_masks_combine_flags_once():
+    for flags in (BodyPart, BodyFeature):
+        assert get_bit_mask(flags) == sum(flag.value for flag in flags)
+        for flag in flags:
+            assert get_bit_mask([flag, flag]) == flag.value
+    assert get_bit_mask([BodyPart.ARM, BodyPart.LEG, BodyPart.ARM]) == BodyPart.ARM.value | BodyPart.LEG.value
+    assert get_bit_mask([]) == 0
+
+
+def test_every_mark_has_its_own_bit():
+    box = Box(Rect(0, 0, 1, 1))
+    for mark in Marks:
+        box.mark(mark)
+        box.mark(mark)
+        assert [other for other in Marks if box.is_marked(other)] == [mark]
+        box.unmark(mark)
+        assert box.marks == 0
+
+    for mark in Marks:
+        box.mark(mark)
+    assert all(box.is_marked(mark) for mark in Marks)
+
+
+def test_legacy_marking_lists_become_bit_sets():
+    for marking in [[]] + [[mark] for mark in Marks] + [list(Marks), [Marks.SELECTED, Marks.SELECTED]]:
+        box = Box.__new__(Box)
+        box.__setstate__({"rect": Rect(0, 0, 1, 1), "marking": marking})
+        assert [mark for mark in Marks if box.is_marked(mark)] == [mark for mark in Marks if mark in marking]
+        assert box.rect == Rect(0, 0, 1, 1)
+
+
+def test_copies_rebuild_the_index():
+    handler = SelectionHandler()
+    boxes = [Box(Rect(x * 40, 0, 10, 10)) for x in range(5)]
+    handler.add_selectables(boxes)
+    assert handler.get_selected(Rect(35, 0, 50, 10)) == boxes[1:3]
+
+    for duplicate in (copy.deepcopy(handler), pickle.loads(pickle.dumps(handler))):
+        assert duplicate._index is None
+        assert [box.rect for box in duplicate.get_selected(Rect(35, 0, 50, 10))] == [Rect(40, 0, 10, 10),
+                                                                                     Rect(80, 0, 10, 10)]
+
+    boxes[0].rect = Rect(200, 0, 10, 10)
+    handler.update_selectables(boxes[:1])
+    handler.remove_selectables(boxes[1:2])
+    assert handler.get_selected(Rect(35, 0, 200, 10)) == [boxes[0], boxes[2], boxes[3], boxes[4]]
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from exporter import Exporter
+from shards import ShardReader, write_shard, append_index, read_index, get_next_key, get_shard_name
+
+
+def create_samples(first: int, count: int, label: str):
+    return [(f"png {first + i}".encode(), {"label": label, "value": first + i}) for i in range(count)]
+
+
+def test_shards_round_trip(tmp_path):
+    folder = str(tmp_path)
+    append_index(folder, write_shard(folder, 0, create_samples(0, 3, "cat")))
+    append_index(folder, write_shard(folder, get_next_key(folder), create_samples(3, 2, "dog")))
+
+    assert [entry["shard"] for entry in read_index(folder)] == [get_shard_name(0), get_shard_name(3)]
+    assert get_next_key(folder) == 5
+
+    reader = ShardReader(folder)
+    assert len(reader) == 5
+    assert reader.get_labels() == ["cat", "dog"]
+    samples = list(reader)
+    assert [key for key, _, _ in samples] == list(range(5))
+    assert [png for _, png, _ in samples] == [f"png {i}".encode() for i in range(5)]
+    assert [meta["value"] for _, _, meta in samples] == list(range(5))
+
+
+def test_unindexed_shards_are_ignored(tmp_path):
+    folder = str(tmp_path)
+    append_index(folder, write_shard(folder, 0, create_samples(0, 2, "cat")))
+    # An interrupted job leaves a shard without index entry behind
+    write_shard(folder, 2, create_samples(2, 2, "cat"))
+    assert len(ShardReader(folder)) == 2
+    assert get_next_key(folder) == 2
+
+
+def test_changed_shard_fails_verification(tmp_path):
+    folder = str(tmp_path)
+    entry = write_shard(folder, 0, create_samples(0, 2, "cat"))
+    append_index(folder, entry)
+    with open(os.path.join(folder, entry["shard"]), "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ValueError):
+        list(ShardReader(folder))
+    assert len(list(ShardReader(folder, verify=False))) == 2
+
+
+def test_exported_shards_continue_keys(compiled_form, tmp_path):
+    folder = str(tmp_path)
+    exporter = Exporter(compiled_form)
+    exporter.export_shards(folder, 5, "tortoise", seed=1, shard_size=2)
+    exporter.export_shards(folder, 3, "tortoise", seed=2, shard_size=2)
+
+    entries = read_index(folder)
+    assert [(entry["first"], entry["count"]) for entry in entries] == [(0, 2), (2, 2), (4, 1), (5, 2), (7, 1)]
+    metas = [meta for _, _, meta in ShardReader(folder)]
+    expected = [(1, i) for i in range(5)] + [(2, i) for i in range(3)]
+    assert [(meta["seed"], meta["variant"]) for meta in metas] == expected
+    assert all(meta["label"] == "tortoise" for meta in metas)
@@ -0,0 +1,77 @@
+import numpy as np
+from pygame import Rect
+
+from spatial_index import SpatialIndex
+
+
+def random_rect(rng: np.random.Generator) -> Rect:
+    # Multiples of 16 put many edges on the cell boundaries of the default 32 pixel grid
+    x, y = rng.integers(-8, 24, size=2) * 16
+    width, height = rng.integers(0, 5, size=2) * 16
+    return Rect(int(x), int(y), int(width), int(height))
+
+
+def touches(a: Rect, b: Rect) -> bool:
+    # Edges count, so rects without area and rects that only share an edge touch as well
+    return a.left <= b.right and b.left <= a.right and a.top <= b.bottom and b.top <= a.bottom
+
+
+def assert_consistent(index: SpatialIndex, rects: dict):
+    assert len(index) == len(rects)
+    for item, rect in rects.items():
+        assert item in index
+        cells = index.get_cells(rect)
+        assert index._entries[item][0] == cells
+        assert all(item in index._cells[cell] for cell in cells)
+    for cell, items in index._cells.items():
+        assert len(items) > 0
+        assert all(cell in index._entries[item][0] for item in items)
+
+
+def brute_force(index: SpatialIndex, rects: dict, query: Rect) -> list:
+    cells = set(index.get_cells(query))
+    return [item for item, rect in rects.items() if cells.intersection(index.get_cells(rect))]
+
+
+def test_insert_remove_and_move_keep_the_grid_consistent():
+    rng = np.random.default_rng(0)
+    index = SpatialIndex()
+    # Insertion order of the items, moved items keep their place
+    rects = {}
+    for item in range(200):
+        rects[item] = random_rect(rng)
+        index.insert(item, rects[item])
+    assert_consistent(index, rects)
+
+    for item in rng.choice(200, size=80, replace=False):
+        rects[int(item)] = random_rect(rng)
+        index.insert(int(item), rects[int(item)])
+    for item in rng.choice(200, size=50, replace=False):
+        del rects[int(item)]
+        index.remove(int(item))
+    index.remove("unknown")
+    assert_consistent(index, rects)
+
+    index.rebuild(rects.items())
+    assert_consistent(index, rects)
+    index.clear()
+    assert_consistent(index, {})
+
+
+def test_query_matches_a_brute_force_scan():
+    rng = np.random.default_rng(1)
+    index = SpatialIndex()
+    rects = {item: random_rect(rng) for item in range(300)}
+    for item, rect in rects.items():
+        index.insert(item, rect)
+    for item in range(0, 300, 3):
+        rects[item] = random_rect(rng)
+        index.insert(item, rects[item])
+
+    queries = [random_rect(rng) for _ in range(200)]
+    # Points on cell boundaries and corners
+    queries += [Rect(x, y, 0, 0) for x in (-32, 0, 31, 32, 64) for y in (-32, 0, 32, 33, 64)]
+    for query in queries:
+        hits = index.query(query)
+        assert hits == brute_force(index, rects, query)
+        assert set(item for item, rect in rects.items() if touches(rect, query)).issubset(hits)
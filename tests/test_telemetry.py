@@ -0,0 +1,69 @@
+import json
+
+from exporter import Exporter
+from telemetry import StageTimer, ExportTelemetry, STAGES, format_record
+
+
+def test_stage_timer_counts_stages_and_files():
+    timer = StageTimer()
+    timer.mark("sample")
+    timer.mark("render")
+    timer.add_file(100)
+    timer.add_file(50)
+
+    assert set(timer.seconds) == set(STAGES)
+    assert all(seconds >= 0 for seconds in timer.seconds.values())
+    assert timer.images == 2
+    assert timer.bytes_written == 150
+
+
+def test_telemetry_sums_up_the_units(tmp_path):
+    records = []
+    telemetry = ExportTelemetry(str(tmp_path / "telemetry.jsonl"), records.append)
+    telemetry.start("png", 5, 3, 2)
+    for size in (10, 20):
+        timer = StageTimer()
+        timer.seconds["render"] = 1.5
+        timer.add_file(size)
+        telemetry.add(timer)
+    telemetry.finish()
+
+    assert [record["event"] for record in records] == ["start", "progress", "progress", "done"]
+    assert records[0]["seed"] == 5 and records[0]["kind"] == "png" and records[0]["workers"] == 2
+    assert [record["done"] for record in records[1:]] == [1, 2, 2]
+    assert records[-1]["bytes_written"] == 30
+    assert records[-1]["stages"]["render"] == 3.0
+    with open(tmp_path / "telemetry.jsonl") as f:
+        assert [json.loads(line) for line in f] == records
+
+
+def test_format_record_per_event():
+    records = []
+    telemetry = ExportTelemetry(callback=records.append)
+    telemetry.start("png", 5, 4, 1)
+    timer = StageTimer()
+    timer.seconds["encode"] = 2.0
+    timer.add_file(2_000_000)
+    telemetry.add(timer)
+    telemetry.finish()
+    start, progress, done = (format_record(record) for record in records)
+
+    assert start == "export of 4 copies started (seed 5)"
+    assert progress.startswith("1/4 copies") and "2.0 MB" in progress and "slowest stage encode" in progress
+    assert done.startswith("1 copies exported in") and "2.0 MB" in done and "encode 2.00 s" in done
+
+
+def test_exports_report_every_copy(compiled_form, tmp_path):
+    exporter = Exporter(compiled_form)
+    png_records = []
+    exporter.export(str(tmp_path / "png"), 5, seed=1, telemetry=ExportTelemetry(callback=png_records.append))
+    shard_records = []
+    exporter.export_shards(str(tmp_path / "shards"), 5, "tortoise", seed=1, shard_size=2,
+                           telemetry=ExportTelemetry(callback=shard_records.append))
+
+    for records, units in ((png_records, 1), (shard_records, 3)):
+        assert [record["event"] for record in records] == ["start"] + ["progress"] * units + ["done"]
+        assert records[-1]["done"] == records[-1]["total"] == 5
+        assert records[-1]["bytes_written"] > 0
+    # Both exports encode the same pngs
+    assert png_records[-1]["bytes_written"] == shard_records[-1]["bytes_written"]